@@ -1,134 +1,423 @@
 from models.classroom import Classroom, ClassroomType
 from models.constraints.constants import Weight
 from models.constraints.constraint import Constraint
-from models.constraints.preffered_event import PreferredEvent
 from models.constraints.unavailable_classroom_time import UnavailableClassroomTime
 from models.constraints.unavailable_staff_time import UnavailableStaffTime
 from models.course import Course, CourseType
+from models import slots
 from models.event import Event
 from models.staff_member import StaffMember
 from models.time_interval import TimeInterval
-from icecream import ic
+from io_utils.dataset import Dataset
+from algorithms.bitset import bit, from_indices, iter_bits, lowest_bit
+from algorithms.nogoods import NogoodStore
+from algorithms.restarts import RESTART_SCHEDULES, Restart, RestartSchedule
+from algorithms.search_engine import Frame, SearchEngine
+from algorithms.soft_constraints import SoftConstraints
+from algorithms.symmetry import Symmetries, order_key
+from algorithms.value_ordering import VALUE_ORDERINGS, ValueOrdering
+from algorithms.variable_ordering import VARIABLE_ORDERINGS, VariableOrdering
 from collections import deque
+import numpy as np
+import random
+from typing import Iterable, Optional
 
 AssignmentType = tuple[Classroom, list[str], TimeInterval]
+# A domain is a bitset over the global value index (see `ARCAlgorithm.values`).
+DomainType = int
+
+# Arc consistency algorithms which can be used to propagate the assignments
+PROPAGATORS = ["ac3", "ac2001"]
 
 class ARCAlgorithm:
+    dataset: Dataset
     staff_members: list[StaffMember]
     courses: list[Course]
     events: list[Event]
     lecture_classes: list[Classroom]
     laboratory_classes: list[Classroom]
     constraints: list[Constraint]
+    # Courses assigned outside of the search (by `LargeNeighborhoodSearch`), the values conflicting with them are left out of the domains
+    fixed: dict[TimeInterval, list[Course]]
+    fixed_classrooms: dict[TimeInterval, set[str]]
+    fixed_staff: dict[TimeInterval, set[str]]
+    fixed_groups: dict[tuple[Course, TimeInterval], bool]  # Whether the course fits the groups of the fixed courses, filled when needed
+    semesters: dict[Course, int]  # Semester of the event of each course, and of each fixed course
+    values: list[AssignmentType]  # Global index of every (classroom, staff combination, time interval) value
+    value_ids: dict[tuple[str, tuple[str, ...], TimeInterval], int]
+    # Compatibility tables, built once per solve by `precompute_compatibility`
+    course_ids: dict[Course, int]
+    group_conflicts: list[list[bool]]  # course x course, True if the groups cannot share a time interval
+    value_slots: list[TimeInterval]
+    value_slot_ids: list[int]  # Dense index of the time interval of each value, see `models.slots`
+    value_classrooms: list[int]  # Index of the classroom of each value
+    value_staff: list[int]  # Bitset over the staff members of each value
+    slot_values: dict[TimeInterval, int]  # Bitset of the values held in each time interval
+    slot_conflicts: list[int]  # Bitset of the values sharing the time interval
+    value_conflicts: list[int]  # Bitset of the values sharing the time interval and a classroom or a staff member
+    neighbors: dict[Course, list[Course]]  # Constraint graph, built by `build_constraint_graph`
+    initial_domains: dict[Course, DomainType]  # Domains after the preprocessing, every solution lies in them
+    # State of the AC-2001 propagator: the last supports found on each arc (course_i, course_j)
+    supports: dict[tuple[Course, Course], tuple[int, int]]
+    # Previous domains (and culprits) of the courses pruned since the search started, undone on backtrack
+    trail: list[tuple[Course, DomainType, int]]
+    # Conflict-directed backjumping: for every course, the bitset (over `course_ids`) of the assigned
+    # courses which explain the values pruned from its domain.
+    culprits: dict[Course, int]
+    conflict: int  # Culprits of the last failure, reported to the caller of `propagate` or `backtrack`
+    nogoods: NogoodStore
+    depths: dict[Course, int]  # Depth at which each assigned course was assigned
+    variable_ordering: str  # Key of `VARIABLE_ORDERINGS`
+    ordering: Optional[VariableOrdering]
+    value_ordering: str  # Key of `VALUE_ORDERINGS`
+    value_order: Optional[ValueOrdering]
+    symmetry_breaking: bool
+    symmetries: Optional[Symmetries]  # Built by `preprocess` once the availabilities are known
+    soft_constraints: Optional[SoftConstraints]  # Costs the symmetries have to respect, when optimizing them
+    value_keys: list[tuple]  # `order_key` of each value, to order the chains of `symmetries`
+    seed: Optional[int]  # Shuffles the order breaking the ties of the variable ordering, None keeps the input order
+    rng: random.Random
+    value_ranks: Optional[list[int]]  # Random rank of each value, breaking the ties of the value ordering
+    # Restarts: the search starts over once it failed `cutoff` more assignments than when the run started.
+    # The nogoods are kept, and the weights of the variable ordering too if `keep_weights` is set.
+    restarts: Optional[RestartSchedule]
+    keep_weights: bool
+    runs: int
+    cutoff: Optional[int]
+    failures: int  # Number of assignments undone by the search
     solution: list[tuple[Course, AssignmentType]]  # List of (Course, Assignment)
 
-    def __init__(self, courses: list[Course], classrooms: list[Classroom], staff_members: list[StaffMember], events: list[Event], constraints: list[Constraint]):
-        self.lecture_classes = list(filter(lambda x: x.get_type() == ClassroomType.LECTURE, classrooms))
-        self.laboratory_classes = list(filter(lambda x: x.get_type() == ClassroomType.LABORATORY, classrooms))
-        self.events = events
+    def __init__(self, courses: list[Course], dataset: Dataset,
+                 propagator: str = "ac3", variable_ordering: str = "mrv", value_ordering: str = "static",
+                 nogood_limit: int = 10_000, symmetry_breaking: bool = False, seed: Optional[int] = None,
+                 restarts: Optional[str] = None, restart_base: int = 100, keep_weights: bool = True,
+                 soft_constraints: Optional[SoftConstraints] = None,
+                 fixed: Optional[list[tuple[Course, AssignmentType]]] = None):
+        self.dataset = dataset
+        self.lecture_classes = list(filter(lambda x: x.get_type() == ClassroomType.LECTURE, dataset.classrooms))
+        self.laboratory_classes = list(filter(lambda x: x.get_type() == ClassroomType.LABORATORY, dataset.classrooms))
+        self.events = dataset.events
         self.courses = courses
-        self.staff_members = staff_members
-        self.constraints = constraints
+        self.staff_members = dataset.staff_members
+        self.constraints = dataset.constraints
+        self.fixed = {}
+        self.fixed_classrooms = {}
+        self.fixed_staff = {}
+        self.fixed_groups = {}
+        for fixed_course, (classroom, staff_member_ids, time_interval) in fixed or ():
+            self.fixed.setdefault(time_interval, []).append(fixed_course)
+            self.fixed_classrooms.setdefault(time_interval, set()).add(classroom.get_id())
+            self.fixed_staff.setdefault(time_interval, set()).update(staff_member_ids)
+        self.semesters = {course: dataset.get_event(course.get_event_id()).get_semester()
+                          for course in courses + [fixed_course for fixed_course, _ in fixed or ()]}
+        self.values = []
+        self.value_ids = {}
+        self.course_ids = {course: index for index, course in enumerate(courses)}
+        self.group_conflicts = []
+        self.value_slots = []
+        self.value_slot_ids = []
+        self.value_classrooms = []
+        self.value_staff = []
+        self.slot_values = {}
+        self.slot_conflicts = []
+        self.value_conflicts = []
+        self.neighbors = {}
+        self.initial_domains = {}
+        self.supports = {}
+        self.trail = []
+        self.culprits = {course: 0 for course in courses}
+        self.conflict = 0
+        self.nogoods = NogoodStore(nogood_limit)
+        self.depths = {}
+        self.variable_ordering = variable_ordering
+        self.ordering = None
+        self.value_ordering = value_ordering
+        self.value_order = None
+        self.symmetry_breaking = symmetry_breaking
+        self.symmetries = None
+        self.soft_constraints = soft_constraints
+        self.value_keys = []
+        self.seed = seed
+        # Without a seed the runs after a restart are still reproducible
+        self.rng = random.Random(0 if seed is None else seed)
+        self.value_ranks = None
+        self.restarts = RESTART_SCHEDULES[restarts](restart_base) if restarts is not None else None
+        self.keep_weights = keep_weights
+        self.runs = 0
+        self.cutoff = None
+        self.failures = 0
+        self.propagate = self.ac2001 if propagator == "ac2001" else self.ac3
         self.solution = []
 
-    def initialize_domains(self) -> dict[Course, list[AssignmentType]]:
+    def get_value_id(self, assignment: AssignmentType) -> int:
+        """
+        Returns the index of `assignment` in the global value index, adding it if it is not there yet.
+        Lectures held by the same instructors share their values.
+        """
+        classroom, staff_member_ids, time_interval = assignment
+        key = (classroom.get_id(), tuple(staff_member_ids), time_interval)
+        value_id = self.value_ids.get(key)
+        if value_id is None:
+            value_id = len(self.values)
+            self.value_ids[key] = value_id
+            self.values.append(assignment)
+        return value_id
+
+    def initialize_domains(self) -> dict[Course, DomainType]:
+        """
+        The domain of every course: the values whose classroom has the type of the course and
+        whose classroom and staff members are available, which fit the fixed courses if any.
+        """
         domains = {}
-
-        # To be added preffered events
-        # preffered_event_constraints = [constraint for constraint in self.constraints if isinstance(constraint, PreferredEvent)]
-
-        # for constraint in self.constraints:
-        #     if isinstance(constraint, PreferredEvent):
-        #         course = next(course for course in self.courses if course.get_event_id() == constraint.get_course_name() and course.get_group() == constraint.get_group())
-        #         domains[course] = []
-
-
-
+        # The free (hour, day) cells of every classroom and staff member, from the stacked availabilities
+        free_classrooms = self.dataset.classroom_availability == 0
+        free_staff = self.dataset.staff_availability == 0
+        # The time interval of each (day, hour), the axes the masks below are built with
+        time_intervals = [[slots.SLOTS[slot] for slot in day] for day in slots.BY_DAY_HOUR]
+        # Courses of the same type held by the same instructors have the same values: they are
+        # built once, and so is the domain when no course is fixed (else it depends on the groups)
+        shared_values: dict[tuple[CourseType, tuple[str, ...]], list[int]] = {}
+        shared_domains: dict[tuple[CourseType, tuple[str, ...]], DomainType] = {}
         for course in self.courses:
             if domains.get(course) is not None:
                 continue
-            possible_assignments = []
-            classrooms = self.lecture_classes if course.get_type() == CourseType.LECTURE else self.laboratory_classes
-            for classroom in classrooms:
-                for time_interval in TimeInterval:
-                    if course.get_type() == CourseType.LECTURE:
-                        staff_combinations = [course.get_instructors()]
-                    else:
-                        staff_combinations = [[staff_id] for staff_id in course.get_instructors()]
-                    for staff_member_ids in staff_combinations:
-                        assignment: AssignmentType = (classroom, staff_member_ids, time_interval)
-                        if self.local_constraints_satisfied(course, assignment):
-                            possible_assignments.append(assignment)
-            domains[course] = possible_assignments
+            key = (course.get_type(), tuple(course.get_instructors()))
+            if key in shared_domains:
+                domains[course] = shared_domains[key]
+                continue
+            value_ids = shared_values.get(key)
+            if value_ids is None:
+                value_ids = shared_values[key] = self.free_values(course, free_classrooms, free_staff, time_intervals)
+            if self.fixed:
+                domains[course] = from_indices(value_id for value_id in value_ids if self.fits_fixed(course, self.values[value_id]))
+            else:
+                domains[course] = shared_domains[key] = from_indices(value_ids)
         return domains
 
-    def local_constraints_satisfied(self, course, assignment: AssignmentType) -> bool:
-        classroom, staff_member_ids, time_interval = assignment
-        line, col = time_interval.convertToMatrixIndices()
+    def free_values(self, course: Course, free_classrooms: np.ndarray, free_staff: np.ndarray,
+                    time_intervals: list[list[TimeInterval]]) -> list[int]:
+        """
+        The ids of the values of `course` whose classroom and staff members are available,
+        the masks of all its classrooms and staff combinations ANDed at once.
+        """
+        classrooms = self.lecture_classes if course.get_type() == CourseType.LECTURE else self.laboratory_classes
+        if course.get_type() == CourseType.LECTURE:
+            staff_combinations = [course.get_instructors()]
+        else:
+            staff_combinations = [[staff_id] for staff_id in course.get_instructors()]
+        if not staff_combinations or not classrooms:
+            return []
+        classroom_free = free_classrooms[[self.dataset.classroom_rows[classroom.get_id()] for classroom in classrooms]]
+        combination_free = np.stack([free_staff[[self.dataset.staff_rows[staff_member_id] for staff_member_id in staff_member_ids]].all(axis=0)
+                                     for staff_member_ids in staff_combinations])
+        # classroom x combination x hour x day, then in the order of the values: classroom, day, hour, combination
+        free = (classroom_free[:, None] & combination_free[None]).transpose(0, 3, 2, 1)
+        return [self.get_value_id((classrooms[classroom_index], staff_combinations[combination], time_intervals[day][hour]))
+                for classroom_index, day, hour, combination in zip(*np.nonzero(free))]
+
+    def is_valid_solution(self, solution: list[tuple[Course, AssignmentType]]) -> bool:
+        """
+        Checks a timetable found by any solver against the hard constraints: the type and the
+        availability of the classroom and of the staff members of every course (the hard
+        unavailabilities applied), then every pair of courses (`are_assignments_compatible`).
+        """
+        self.apply_global_hard_constraints()
+        for course, (classroom, staff_member_ids, time_interval) in solution:
+            expected_type = ClassroomType.LECTURE if course.get_type() == CourseType.LECTURE else ClassroomType.LABORATORY
+            if classroom.get_type() != expected_type:
+                return False
+            if course.get_type() == CourseType.LECTURE:
+                if list(staff_member_ids) != list(course.get_instructors()):
+                    return False
+            elif len(staff_member_ids) != 1 or staff_member_ids[0] not in course.get_instructors():
+                return False
+            line, col = slots.cell(time_interval)
+            if classroom.availability[line, col] != 0:
+                return False
+            if any(self.dataset.get_staff_member(staff_member_id).availability[line, col] != 0
+                   for staff_member_id in staff_member_ids):
+                return False
+        return all(self.are_assignments_compatible(assignment_i, assignment_j, course_i, course_j)
+                   for index, (course_i, assignment_i) in enumerate(solution)
+                   for course_j, assignment_j in solution[index + 1:])
 
-        if course.get_type() == CourseType.LECTURE and classroom.get_type() != ClassroomType.LECTURE:
-            return False
-        if course.get_type() == CourseType.LABORATORY and classroom.get_type() != ClassroomType.LABORATORY:
+    def fits_fixed(self, course: Course, assignment: AssignmentType) -> bool:
+        """
+        Checks an assignment against the fixed courses, like `are_assignments_compatible` would
+        against each of them.
+        """
+        classroom, staff_member_ids, time_interval = assignment
+        if classroom.get_id() in self.fixed_classrooms.get(time_interval, ()):
             return False
-
-        if classroom.availability[line, col] != 0:
+        staff = self.fixed_staff.get(time_interval, ())
+        if any(staff_member_id in staff for staff_member_id in staff_member_ids):
             return False
-        for staff_member_id in staff_member_ids:
-            staff_member = next(member for member in self.staff_members if member.get_id() == staff_member_id)
-            if staff_member.availability[line, col] != 0:
-                return False
-        # Additional local constraints can be added here
-        return True
+        key = (course, time_interval)
+        fits = self.fixed_groups.get(key)
+        if fits is None:
+            fits = self.fixed_groups[key] = all(
+                self.are_groups_compatible(course, fixed_course) and self.are_groups_compatible(fixed_course, course)
+                for fixed_course in self.fixed.get(time_interval, ()))
+        return fits
+
+    def precompute_compatibility(self):
+        """
+        Builds the lookup tables used by `are_compatible` and `revise`. It must run
+        after `initialize_domains`, once the global value index is complete.
+        """
+        self.group_conflicts = [
+            # The group relation is not symmetric (A vs A1 differs from A1 vs A), two
+            # courses conflict if any of the two directions says so.
+            [not (self.are_groups_compatible(course_i, course_j) and self.are_groups_compatible(course_j, course_i))
+             for course_j in self.courses]
+            for course_i in self.courses
+        ]
+
+        # Small per value keys for the pairwise checks done by `are_compatible`
+        classroom_ids = {classroom.get_id(): index for index, classroom in enumerate(self.lecture_classes + self.laboratory_classes)}
+        staff_ids = {staff_member.get_id(): index for index, staff_member in enumerate(self.staff_members)}
+        self.value_slots = [time_interval for _, _, time_interval in self.values]
+        self.value_slot_ids = [slots.INDEX[time_interval] for time_interval in self.value_slots]
+        self.value_classrooms = [classroom_ids[classroom.get_id()] for classroom, _, _ in self.values]
+        self.value_staff = [sum(bit(staff_ids[staff_member_id]) for staff_member_id in staff_member_ids)
+                            for _, staff_member_ids, _ in self.values]
+
+        # For each time interval index the values by classroom and by staff member
+        by_classroom: dict[tuple[TimeInterval, str], int] = {}
+        by_staff: dict[tuple[TimeInterval, str], int] = {}
+        self.slot_values = {time_interval: 0 for time_interval in TimeInterval}
+        for value, (classroom, staff_member_ids, time_interval) in enumerate(self.values):
+            self.slot_values[time_interval] |= bit(value)
+            key = (time_interval, classroom.get_id())
+            by_classroom[key] = by_classroom.get(key, 0) | bit(value)
+            for staff_member_id in staff_member_ids:
+                key = (time_interval, staff_member_id)
+                by_staff[key] = by_staff.get(key, 0) | bit(value)
+
+        self.slot_conflicts = [self.slot_values[time_interval] for _, _, time_interval in self.values]
+        self.value_conflicts = []
+        for classroom, staff_member_ids, time_interval in self.values:
+            conflicts = by_classroom[(time_interval, classroom.get_id())]
+            for staff_member_id in staff_member_ids:
+                conflicts |= by_staff[(time_interval, staff_member_id)]
+            self.value_conflicts.append(conflicts)
+
+    def build_constraint_graph(self, domains: dict[Course, DomainType]):
+        """
+        Computes the neighbors of every course. Two courses are neighbors only if they
+        can take the same time interval and then compete for a classroom, a staff member
+        or a group. Domains only shrink during the search, so the graph built from the
+        initial domains stays valid until the end of the solve.
+        """
+        course_slots: dict[Course, int] = {}
+        classrooms: dict[Course, int] = {}
+        staff: dict[Course, int] = {}
+        for course in self.courses:
+            course_slots[course] = classrooms[course] = staff[course] = 0
+            for value in iter_bits(domains[course]):
+                course_slots[course] |= bit(self.value_slot_ids[value])
+                classrooms[course] |= bit(self.value_classrooms[value])
+                staff[course] |= self.value_staff[value]
+
+        self.neighbors = {course: [] for course in self.courses}
+        for index_i, course_i in enumerate(self.courses):
+            for index_j in range(index_i + 1, len(self.courses)):
+                course_j = self.courses[index_j]
+                if not course_slots[course_i] & course_slots[course_j]:
+                    continue
+                if (self.group_conflicts[index_i][index_j]
+                        or classrooms[course_i] & classrooms[course_j]
+                        or staff[course_i] & staff[course_j]):
+                    self.neighbors[course_i].append(course_j)
+                    self.neighbors[course_j].append(course_i)
+
+    def incompatible_values(self, value_i: int, course_i: Course, course_j: Course) -> int:
+        """
+        Returns the bitset of the values of course_j which are not compatible with course_i taking `value_i`.
+        """
+        if self.group_conflicts[self.course_ids[course_i]][self.course_ids[course_j]]:
+            return self.slot_conflicts[value_i]
+        return self.value_conflicts[value_i]
 
     def apply_global_hard_constraints(self):
         for constraint in self.constraints:
             if constraint.get_weight() != Weight.HARD.value:
                 continue
             if isinstance(constraint, UnavailableClassroomTime):
-                classroom = next(classroom for classroom in self.lecture_classes if classroom.get_id() == constraint.get_classroom_id())
+                classroom = self.dataset.get_classroom(constraint.get_classroom_id())
+                if classroom is None:
+                    continue
                 for interval in constraint.get_time_intervals():
-                    line, col = interval.convertToMatrixIndices()
+                    line, col = slots.cell(interval)
                     classroom.availability[line, col] = -1
             if isinstance(constraint, UnavailableStaffTime):
-                staff_member = next(member for member in self.staff_members if member.get_name() == constraint.get_name())
+                staff_member = self.dataset.get_staff_member_by_name(constraint.get_name())
+                if staff_member is None:
+                    continue
                 for interval in constraint.get_time_intervals():
-                    line, col = interval.convertToMatrixIndices()
+                    line, col = slots.cell(interval)
                     staff_member.availability[line, col] = -1
                 
 
-    def ac3(self, domains: dict[Course, list[AssignmentType]], assignment: dict[Course, AssignmentType] = {}) -> bool:
+    def ac3(self, domains: dict[Course, DomainType], assignment: dict[Course, int] = {}, changed: Optional[Iterable[Course]] = None) -> bool:
         """
         Applies the AC-3 algorithm to reduce the domains of the courses
         by enforcing arc consistency based on binary constraints.
+        Only the arcs of the constraint graph (see `build_constraint_graph`) are revised.
 
         Args:
-            domains (dict): A dictionary where keys are courses, and values are lists of possible assignments.
+            domains (dict): A dictionary where keys are courses, and values are bitsets of possible assignments.
             assignment (dict): Current assignment of courses.
+            changed (Iterable[Course]): Courses whose domains changed since the domains were last
+                arc consistent. When omitted every arc is revised.
 
         Returns:
             bool: True if the domains remain consistent, False if a domain is emptied.
         """
+        return self.enforce_arc_consistency(domains, assignment, changed, self.revise)
+
+    def ac2001(self, domains: dict[Course, DomainType], assignment: dict[Course, int] = {}, changed: Optional[Iterable[Course]] = None) -> bool:
+        """
+        Same as `ac3`, but the arcs are revised with `revise_with_supports`, which remembers
+        the last supports found on every arc instead of searching them again.
+        """
+        return self.enforce_arc_consistency(domains, assignment, changed, self.revise_with_supports)
+
+    def enforce_arc_consistency(self, domains: dict[Course, DomainType], assignment: dict[Course, int],
+                                changed: Optional[Iterable[Course]], revise) -> bool:
         queue = deque()
-        # Initialize the queue with all arcs
-        for course_i in self.courses:
-            for course_j in self.courses:
-                if course_i != course_j:
+        if changed is None:
+            # Initialize the queue with all arcs
+            for course_i in self.courses:
+                for course_j in self.neighbors[course_i]:
                     queue.append((course_i, course_j))
+        else:
+            # Only the arcs pointing to a changed course can lose their support
+            for course_j in changed:
+                for course_i in self.neighbors[course_j]:
+                    queue.append((course_i, course_j))
+        pending = set(queue)
 
         while queue:
-            course_i, course_j = queue.popleft()
+            arc = queue.popleft()
+            pending.discard(arc)
+            course_i, course_j = arc
 
-            if self.revise(domains, course_i, course_j, assignment):
+            if revise(domains, course_i, course_j, assignment):
                 # If a domain is emptied, no solution is possible
                 if not domains[course_i]:
+                    self.conflict = self.culprits[course_i]
+                    if self.ordering is not None:
+                        self.ordering.wiped_out(course_i, course_j, domains)
                     return False
-                # Add all neighbors of course_i back into the queue
-                for course_k in self.courses:
-                    if course_k != course_i and course_k != course_j:
+                # Add the neighbors of course_i back into the queue
+                for course_k in self.neighbors[course_i]:
+                    if course_k != course_j and (course_k, course_i) not in pending:
+                        pending.add((course_k, course_i))
                         queue.append((course_k, course_i))
         return True
 
-    def revise(self, domains: dict[Course, list[AssignmentType]], course_i: Course, course_j: Course, assignment: dict[Course, AssignmentType]) -> bool:
+    def revise(self, domains: dict[Course, DomainType], course_i: Course, course_j: Course, assignment: dict[Course, int]) -> bool:
         """
         Removes inconsistent values from the domain of course_i.
 
@@ -141,28 +430,134 @@ class ARCAlgorithm:
         Returns:
             bool: True if the domain of course_i was revised, False otherwise.
         """
-        revised = False
-        assigned_j = course_j in assignment
+        # When course_j is assigned its only possible value is the assigned one
+        domain_j = bit(assignment[course_j]) if course_j in assignment else domains[course_j]
+        if self.spans_several_slots(domain_j):
+            return False
 
-        for assignment_i in domains[course_i][:]:
-            if assigned_j:
-                # course_j is assigned
-                assignment_j = assignment[course_j]
-                if not self.are_compatible(assignment_i, assignment_j, course_i, course_j):
-                    domains[course_i].remove(assignment_i)
-                    revised = True
-            else:
-                # course_j is not assigned
-                # Check if there exists an assignment for course_j that is compatible
-                if not any(self.are_compatible(assignment_i, assignment_j, course_i, course_j)
-                           for assignment_j in domains[course_j]):
-                    domains[course_i].remove(assignment_i)
-                    revised = True
-        return revised
+        # When the groups conflict every value in the same time interval is incompatible
+        if self.group_conflicts[self.course_ids[course_i]][self.course_ids[course_j]]:
+            incompatible = self.slot_conflicts
+        else:
+            incompatible = self.value_conflicts
+
+        removed = 0
+        for value_i in iter_bits(domains[course_i]):
+            # Check if there exists an assignment for course_j that is compatible
+            # (it is cheaper to test `domain_j & incompatible != domain_j` than to build `~incompatible`)
+            if domain_j & incompatible[value_i] == domain_j:
+                removed |= bit(value_i)
+
+        if removed:
+            self.set_domain(domains, course_i, domains[course_i] & ~removed, self.explain(course_j, assignment))
+            return True
+        return False
 
-    def are_compatible(self, assignment_i: AssignmentType, assignment_j: AssignmentType, course_i: Course, course_j: Course) -> bool:
+    def spans_several_slots(self, domain: DomainType) -> bool:
         """
-        Checks whether two assignments are compatible based on constraints.
+        Every value incompatible with a value lies in its time interval, so a domain with values
+        in two time intervals supports every value of every other course.
+        """
+        return bool(domain) and domain != domain & self.slot_conflicts[lowest_bit(domain)]
+
+    def revise_with_supports(self, domains: dict[Course, DomainType], course_i: Course, course_j: Course, assignment: dict[Course, int]) -> bool:
+        """
+        Same as `revise`, but with the supports of the arc cached between calls (AC-2001 style).
+
+        Every value incompatible with a value of course_i lies in the same time interval, so two
+        values of course_j in different time intervals support the whole domain of course_i.
+        They are remembered for the arc, and as long as both are still in the domain of course_j
+        the revision costs two bit tests. Once they are lost the search resumes from the lowest
+        remaining value, and only the values of course_i in the time interval left to course_j
+        are checked one by one.
+        """
+        domain_j = bit(assignment[course_j]) if course_j in assignment else domains[course_j]
+        arc = (course_i, course_j)
+        supports = self.supports.get(arc)
+        if supports is not None and (domain_j >> supports[0]) & 1 and (domain_j >> supports[1]) & 1:
+            return False
+
+        first = lowest_bit(domain_j)
+        slot_values = self.slot_conflicts[first]
+        others = domain_j ^ (domain_j & slot_values)
+        if others:
+            self.supports[arc] = (first, lowest_bit(others))
+            return False
+
+        # course_j is left with a single time interval, only that interval can lose support
+        if self.group_conflicts[self.course_ids[course_i]][self.course_ids[course_j]]:
+            removed = domains[course_i] & slot_values
+        else:
+            removed = 0
+            for value_i in iter_bits(domains[course_i] & slot_values):
+                if domain_j & self.value_conflicts[value_i] == domain_j:
+                    removed |= bit(value_i)
+
+        if removed:
+            self.set_domain(domains, course_i, domains[course_i] & ~removed, self.explain(course_j, assignment))
+            return True
+        return False
+
+    def explain(self, course: Course, assignment: dict[Course, int]) -> int:
+        """
+        Returns the assigned courses responsible for the current domain of `course`.
+        Values removed because of that domain have the same culprits.
+        """
+        if course in assignment:
+            return self.culprits[course] | bit(self.course_ids[course])
+        return self.culprits[course]
+
+    def set_domain(self, domains: dict[Course, DomainType], course: Course, domain: DomainType, culprits: int = 0):
+        """
+        Replaces the domain of `course`, recording the previous one on the trail.
+        `culprits` are the assigned courses which explain the removed values.
+        """
+        old_domain = domains[course]
+        self.trail.append((course, old_domain, self.culprits[course]))
+        domains[course] = domain
+        self.culprits[course] |= culprits
+        if self.ordering is not None:
+            self.ordering.domain_changed(course, old_domain, domain)
+            self.value_order.domain_changed(course, old_domain, domain)
+
+    def undo(self, domains: dict[Course, DomainType], mark: int):
+        """
+        Restores the domains changed since the trail had `mark` entries.
+        """
+        trail = self.trail
+        while len(trail) > mark:
+            course, domain, culprits = trail.pop()
+            if self.ordering is not None:
+                self.ordering.domain_changed(course, domains[course], domain)
+                self.value_order.domain_changed(course, domains[course], domain)
+            domains[course] = domain
+            self.culprits[course] = culprits
+
+    def are_compatible(self, value_i: int, value_j: int, course_i: Course, course_j: Course) -> bool:
+        """
+        Checks whether two values of the global value index are compatible based on constraints.
+        This is a lookup in the tables built by `precompute_compatibility`.
+
+        Args:
+            value_i (int): Index of the assignment for course_i.
+            value_j (int): Index of the assignment for course_j.
+            course_i (Course): The first course.
+            course_j (Course): The second course.
+
+        Returns:
+            bool: True if the assignments are compatible, False otherwise.
+        """
+        if self.value_slots[value_i] != self.value_slots[value_j]:
+            return True
+        if self.group_conflicts[self.course_ids[course_i]][self.course_ids[course_j]]:
+            return False
+        return (self.value_classrooms[value_i] != self.value_classrooms[value_j]
+                and not self.value_staff[value_i] & self.value_staff[value_j])
+
+    def are_assignments_compatible(self, assignment_i: AssignmentType, assignment_j: AssignmentType, course_i: Course, course_j: Course) -> bool:
+        """
+        Checks whether two assignments are compatible without using the precomputed tables.
+        It is the reference the tables are checked against.
 
         Args:
             assignment_i (AssignmentType): Assignment for course_i.
@@ -185,11 +580,14 @@ class ARCAlgorithm:
             if set(staff_i) & set(staff_j):
                 return False
             # Check for group conflicts
-            if not self.are_groups_compatible(course_i, course_j):
+            if not (self.are_groups_compatible(course_i, course_j) and self.are_groups_compatible(course_j, course_i)):
                 return False
         return True
 
     def are_groups_compatible(self, course1: Course, course2: Course) -> bool:
+        # The groups of two semesters are different students
+        if self.semesters[course1] != self.semesters[course2]:
+            return True
         if course1.get_group() == "ABE" or course2.get_group() == "ABE":
             return True
         if len(course1.get_group()) == 2 and len(course2.get_group()) == 2:
@@ -197,73 +595,226 @@ class ARCAlgorithm:
         else:
             return course1.get_group() != course2.get_group()[0]
 
-    def select_unassigned_variable(self, assignment: dict[Course, AssignmentType], domains: dict[Course, list[AssignmentType]]) -> Course:
-        unassigned_courses = [c for c in self.courses if c not in assignment]
-        # Use Minimum Remaining Values (MRV) heuristic
-        min_domain_size = float('inf')
-        selected_course = None
-        for course in unassigned_courses:
-            domain_size = len(domains[course])
-            if domain_size < min_domain_size:
-                min_domain_size = domain_size
-                selected_course = course
-        return selected_course
-
-    def is_consistent(self, course: Course, value: AssignmentType, assignment: dict[Course, AssignmentType]) -> bool:
+    def select_unassigned_variable(self, assignment: dict[Course, int], domains: dict[Course, DomainType]) -> Course:
+        """
+        Returns the next course to assign, chosen by the heuristic named by `variable_ordering`
+        (Minimum Remaining Values by default).
+        """
+        if self.ordering is None:
+            self.start_search(domains)
+        return self.ordering.select(assignment, domains)
+
+    def start_search(self, domains: dict[Course, DomainType]):
+        """
+        Creates the variable and value orderings. From now on they follow the domain changes.
+        With a seed, and in the runs after a restart, their ties are broken at random.
+        """
+        courses = self.courses
+        if self.seed is not None or self.runs:
+            courses = self.rng.sample(courses, len(courses))
+            self.value_ranks = self.rng.sample(range(len(self.values)), len(self.values))
+        previous = self.ordering
+        self.ordering = VARIABLE_ORDERINGS[self.variable_ordering](courses, self.neighbors)
+        if previous is not None and self.keep_weights:
+            self.ordering.carry_over(previous)
+        self.ordering.start(domains)
+        self.value_order = VALUE_ORDERINGS[self.value_ordering](self)
+        self.value_order.start(domains)
+
+    def is_consistent(self, course: Course, value: int, assignment: dict[Course, int]) -> bool:
         for other_course, other_value in assignment.items():
             if not self.are_compatible(value, other_value, course, other_course):
                 return False
         return True
 
-    def backtrack(self, assignment: dict[Course, AssignmentType], domains: dict[Course, list[AssignmentType]]) -> bool:
-        if len(assignment) == len(self.courses):
-            self.solution = [(course, assignment[course]) for course in self.courses]
+    def backtrack(self, assignment: dict[Course, int], domains: dict[Course, DomainType]) -> bool:
+        """
+        Searches in place: `assignment` and `domains` are modified and restored
+        from the trail when a branch fails, instead of being copied at every node.
+        """
+        if self.search_engine(assignment, domains).solve():
+            self.solution = [(course, self.values[assignment[course]]) for course in self.courses]
             return True
+        return False
+
+    def search_engine(self, assignment: dict[Course, int], domains: dict[Course, DomainType]) -> SearchEngine:
+        return SearchEngine(lambda: self.frame(assignment, domains), len(self.courses) - len(assignment))
 
+    def frame(self, assignment: dict[Course, int], domains: dict[Course, DomainType]) -> Frame:
+        """
+        Assigns the values of the next course one after the other, for `search_engine`.
+
+        When every value of a course fails, `self.conflict` holds the assigned courses
+        responsible for it (conflict-directed backjumping). The frame of the previous course
+        skips its remaining values when it is not one of them, and the failing combination
+        is kept as a nogood.
+        """
         course = self.select_unassigned_variable(assignment, domains)
-        for value in domains[course]:
-            if self.is_consistent(course, value, assignment):
-                # Make a copy of assignment and domains
-                local_assignment = assignment.copy()
-                local_assignment[course] = value
-                # Make a shallow copy of domains and deep copy the values
-                local_domains = {c: domains[c][:] for c in domains}
-                # Assign the value to the course and reduce its domain
-                local_domains[course] = [value]
-
-                # Apply AC-3 after the assignment
-                if self.ac3(local_domains, local_assignment):
-                    result = self.backtrack(local_assignment, local_domains)
-                    if result:
-                        return True
-                # If AC-3 failed or recursive call failed, backtrack
-        return False
+        course_bit = bit(self.course_ids[course])
+        # The values pruned before reaching this course are part of the failure
+        conflict = self.culprits[course]
+        self.depths[course] = len(assignment)
+        used = self.used_classrooms(assignment) if self.symmetries is not None else {}
+        for value in self.value_order.order(course, domains[course]):
+            if self.symmetries is not None:
+                classroom, staff_member_ids, time_interval = self.values[value]
+                if not self.symmetries.classroom_weight(classroom, used.get(time_interval, ())):
+                    # Symmetric to the value with the first free classroom of the class, which fails for the same culprits
+                    continue
+            if not self.is_consistent(course, value, assignment):
+                conflict |= sum(bit(self.course_ids[other]) for other in assignment)
+                continue
+            nogood = self.nogoods.find(course, value, assignment)
+            if nogood is not None:
+                conflict |= sum(bit(self.course_ids[other]) for other, _ in nogood)
+                continue
 
-    def solve(self) -> bool:
+            mark = len(self.trail)
+            # Assign the value to the course and reduce its domain
+            self.ordering.assigning(course)
+            self.value_order.assigning(course, domains[course])
+            assignment[course] = value
+            self.set_domain(domains, course, bit(value))
+
+            # Apply AC-3 after the assignment
+            changed = self.order_chain(domains, course, value, assignment) if self.symmetries is not None else [course]
+            consistent = changed is not None and self.propagate(domains, assignment, changed)
+            self.ordering.propagated(course, consistent)
+            if consistent:
+                yield 1
+            # If AC-3 failed or the search below failed, backtrack
+            self.failures += 1
+            if self.cutoff is not None and self.failures >= self.cutoff:
+                raise Restart()
+            self.undo(domains, mark)
+            del assignment[course]
+            self.ordering.unassigned(course, domains[course])
+            self.value_order.unassigned(course, domains[course])
+
+            if consistent and not self.conflict & course_bit:
+                # The failure below does not depend on this course, jump back over it
+                del self.depths[course]
+                return
+            conflict |= self.conflict
+
+        del self.depths[course]
+        self.conflict = conflict & ~course_bit
+        self.learn_nogood(assignment)
+
+    def used_classrooms(self, assignment: dict[Course, int]) -> dict[TimeInterval, set[str]]:
+        used = {}
+        for value in assignment.values():
+            classroom, _, time_interval = self.values[value]
+            used.setdefault(time_interval, set()).add(classroom.get_id())
+        return used
+
+    def order_chain(self, domains: dict[Course, DomainType], course: Course, value: int, assignment: dict[Course, int]) -> Optional[list[Course]]:
         """
-        Executes the scheduling process using AC-3 and backtracking.
+        Keeps in the domains of the unassigned courses of the chain of `course` (see `Symmetries`)
+        only the values ordered with `value`: lower before it, higher after it. Returns the courses
+        whose domain changed, or None if one of them was emptied.
+        """
+        _, staff_member_ids, time_interval = self.values[value]
+        key = order_key(time_interval, staff_member_ids)
+        course_bit = bit(self.course_ids[course])
+        changed = [course]
+        for links, before in ((self.symmetries.previous, True), (self.symmetries.next, False)):
+            other = links.get(course)
+            while other is not None:
+                if other not in assignment:
+                    domain = domains[other]
+                    kept = sum(bit(other_value) for other_value in iter_bits(domain)
+                               if (self.value_keys[other_value] < key) == before)
+                    if kept != domain:
+                        self.set_domain(domains, other, kept, course_bit)
+                        if not kept:
+                            self.conflict = self.culprits[other]
+                            self.ordering.wiped_out(other, course, domains)
+                            return None
+                        changed.append(other)
+                other = links.get(other)
+        return changed
+
+    def learn_nogood(self, assignment: dict[Course, int]):
+        """
+        Stores the assignment of the courses in `self.conflict` as a nogood, watched by the one assigned last.
+        """
+        culprits = [course for course in assignment if self.conflict & bit(self.course_ids[course])]
+        if not culprits:
+            return
+        watched = max(culprits, key=self.depths.__getitem__)
+        self.nogoods.add(frozenset((course, assignment[course]) for course in culprits), (watched, assignment[watched]))
+
+    def prepare(self) -> dict[Course, DomainType]:
+        """
+        Builds the domains, with the hard constraints applied, and the tables used by the search.
+        The domains are not made arc consistent yet.
         """
         self.apply_global_hard_constraints()
+        if self.symmetry_breaking:
+            self.symmetries = Symmetries(self.courses, self.lecture_classes + self.laboratory_classes, self.soft_constraints)
         domains = self.initialize_domains()
+        self.precompute_compatibility()
+        self.value_keys = [order_key(time_interval, staff_member_ids) for _, staff_member_ids, time_interval in self.values]
+        self.build_constraint_graph(domains)
+        return domains
+
+    def preprocess(self) -> Optional[dict[Course, DomainType]]:
+        """
+        Builds the domains and the tables used by the search (`prepare`) and makes the domains
+        arc consistent. Returns None if a domain was emptied.
+        """
+        domains = self.prepare()
         # Apply AC-3 as a preprocessing step and print the domains
-        initial_ac3_result = self.ac3(domains)
+        initial_ac3_result = self.propagate(domains)
+        # The preprocessing is never undone
+        self.trail.clear()
         if not initial_ac3_result:
             print("No solution exists after applying AC-3 as preprocessing.")
+            return None
+        self.initial_domains = dict(domains)
+        return domains
+
+    def solve(self) -> bool:
+        """
+        Executes the scheduling process using AC-3 and backtracking.
+        """
+        domains = self.preprocess()
+        if domains is None:
             return False
 
         # Print the domains after AC-3 preprocessing
         print("\nDomains after AC-3 preprocessing:")
         for course in self.courses:
             print(f"Course {course.get_event_id()} domain:")
-            for assignment in domains[course]:
-                classroom, staff_member_ids, time_interval = assignment
+            for value in iter_bits(domains[course]):
+                classroom, staff_member_ids, time_interval = self.values[value]
                 print(f"  Classroom: {classroom.get_id()}, Staff: {staff_member_ids}, Time: {time_interval}")
 
         assignment = {}
 
-        if self.backtrack(assignment, domains):
-            print("Solution found.")
+        if self.search(assignment, domains):
+            print(f"Solution found after {self.failures} failed assignments.")
             return True
         else:
             print("No solution exists.")
             return False
+
+    def search(self, assignment: dict[Course, int], domains: dict[Course, DomainType]) -> bool:
+        """
+        Runs `backtrack`, restarting it from the preprocessed domains each time it reaches
+        the cutoff of the restart schedule, if there is one.
+        """
+        while True:
+            if self.restarts is not None:
+                self.cutoff = self.failures + self.restarts.cutoff(self.runs)
+            try:
+                return self.backtrack(assignment, domains)
+            except Restart:
+                # The trail was cleared after the preprocessing, undoing all of it leaves the preprocessed domains
+                self.undo(domains, 0)
+                assignment.clear()
+                self.depths.clear()
+                self.conflict = 0
+                self.runs += 1
+                self.start_search(domains)
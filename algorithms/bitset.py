@@ -0,0 +1,46 @@
+from typing import Iterator
+
+# Domains are stored as Python ints used as bitsets: bit `i` is set when the
+# value with index `i` in the global value index is still possible.
+
+def bit(index: int) -> int:
+    return 1 << index
+
+# Above this many set bits it is faster to scan the binary representation once
+# than to clear the lowest bit of a (large) int at every step.
+SPARSE_BITS = 16
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """
+    Yields the indices of the set bits of `mask`, from the lowest to the highest.
+    """
+    if mask.bit_count() <= SPARSE_BITS:
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+        return
+    digits = bin(mask)[:1:-1]
+    index = digits.find('1')
+    while index != -1:
+        yield index
+        index = digits.find('1', index + 1)
+
+def lowest_bit(mask: int) -> int:
+    """
+    Returns the index of the lowest set bit of `mask` or -1 when `mask` is empty.
+    """
+    return (mask & -mask).bit_length() - 1
+
+def from_indices(indices) -> int:
+    indices = list(indices)
+    if len(indices) <= SPARSE_BITS:
+        mask = 0
+        for index in indices:
+            mask |= 1 << index
+        return mask
+    # Each `|=` copies the whole int: writing the binary digits and parsing them once is linear
+    digits = bytearray(b'0') * (max(indices) + 1)
+    for index in indices:
+        digits[-1 - index] = ord('1')
+    return int(digits, 2)
@@ -3,6 +3,12 @@ from models.course import Course, CourseType
 from models.event import Event
 from models.staff_member import StaffMember
 from models.time_interval import TimeInterval
+from io_utils.dataset import Dataset
+from algorithms.restarts import RESTART_SCHEDULES, Restart, RestartSchedule
+from algorithms.search_engine import Frame, SearchEngine
+from algorithms.symmetry import OrderKey, Symmetries, order_key
+from typing import Iterator, Optional
+import random
 
 def are_groups_equal(group1: str, group2: str) -> bool:
     if group1 == 'ABE' or group2 == 'ABE':
@@ -13,100 +19,200 @@ def are_groups_equal(group1: str, group2: str) -> bool:
         return group1[0] == group2[0]
 
 class BKTAlgorithm:
+    dataset: Dataset
     staff_members: list[StaffMember]
     courses: list[Course]
     events: list[Event]
     lecture_classes: list[Classroom]
     laboratory_classes: list[Classroom]
+    time_intervals: list[TimeInterval]  # In the order the values are tried, shuffled by the seed
     solution: list[tuple[Course, tuple[Classroom, list[str], TimeInterval]]] # str is list of staff_member_ids
+    symmetries: Optional[Symmetries]  # None when symmetry breaking is disabled
+    keys: dict[Course, OrderKey]  # (time interval, staff) of the assigned courses, for `Symmetries.is_ordered`
+    # Occupancy of the time intervals by the courses of `solution`, kept up to date by `assign` and `unassign`
+    group_keys: dict[Course, tuple[list[tuple[int, str]], list[tuple[int, str]]]]  # See `group_buckets`, with the semester
+    classroom_usage: dict[TimeInterval, set[str]]  # Ids of the classrooms taken
+    staff_usage: dict[TimeInterval, dict[str, int]]  # Number of courses held by each staff member
+    group_usage: dict[TimeInterval, dict[tuple[int, str], dict[Optional[int], int]]]  # (semester, bucket) -> optional package -> courses
 
-    def __init__(self, courses: list[Course], classrooms: list[Classroom], staff_members: list[StaffMember], events: list[Event]):
-        self.lecture_classes = list(filter(lambda x: x.get_type() == ClassroomType.LECTURE ,classrooms))
-        self.laboratory_classes = list(filter(lambda x: x.get_type() == ClassroomType.LABORATORY ,classrooms))
-        self.events = events
+    restarts: Optional[RestartSchedule]  # The search starts over once it failed `cutoff` assignments in a run
+    rng: random.Random
+    runs: int
+    cutoff: Optional[int]
+    failures: int  # Number of assignments undone by `backtrack`
+
+    def __init__(self, courses: list[Course], dataset: Dataset, symmetry_breaking: bool = False, seed: Optional[int] = None,
+                 restarts: Optional[str] = None, restart_base: int = 100):
+        self.dataset = dataset
+        self.lecture_classes = list(filter(lambda x: x.get_type() == ClassroomType.LECTURE ,dataset.classrooms))
+        self.laboratory_classes = list(filter(lambda x: x.get_type() == ClassroomType.LABORATORY ,dataset.classrooms))
+        self.events = dataset.events
         self.courses = courses
-        self.staff_members = staff_members
+        self.staff_members = dataset.staff_members
+        self.time_intervals = list(TimeInterval)
+        # Without a seed the runs after a restart are still reproducible
+        self.rng = random.Random(0 if seed is None else seed)
+        if seed is not None:
+            self.shuffle_values()
+        self.restarts = RESTART_SCHEDULES[restarts](restart_base) if restarts is not None else None
+        self.runs = 0
+        self.cutoff = None
+        self.failures = 0
         self.solution = []
+        self.symmetries = Symmetries(courses, dataset.classrooms) if symmetry_breaking else None
+        self.keys = {}
+        self.group_keys = {}
+        for course in courses:
+            semester = dataset.get_event(course.get_event_id()).get_semester()
+            counted, conflicting = self.group_buckets(course.get_group())
+            self.group_keys[course] = ([(semester, bucket) for bucket in counted], [(semester, bucket) for bucket in conflicting])
+        self.classroom_usage = {time_interval: set() for time_interval in TimeInterval}
+        self.staff_usage = {time_interval: {} for time_interval in TimeInterval}
+        self.group_usage = {time_interval: {} for time_interval in TimeInterval}
 
-    def is_valid_assignment(self, course: Course, classroom: Classroom, staff_member_ids: list[str], time_interval: TimeInterval):
-        event = next(event for event in self.events if event.get_id() == course.get_event_id())
+    def shuffle_values(self):
+        """
+        Tries the values in another order. The courses keep theirs (events together), the search depends on it.
+        """
+        self.rng.shuffle(self.lecture_classes)
+        self.rng.shuffle(self.laboratory_classes)
+        self.rng.shuffle(self.time_intervals)
 
-        for solution in self.solution:
-            course_, (classroom_, staf_id, time_interval_) = solution
-            event_ = next(event for event in self.events if event.get_id() == course_.get_event_id())
+    def group_buckets(self, group: str) -> tuple[list[str], list[str]]:
+        """
+        Returns the buckets of `group_usage` a course of `group` is counted in and the buckets
+        holding the courses it conflicts with, following `are_groups_equal`:
+        ABE conflicts with every group, a half year group (A1) with itself, its year (A) and ABE,
+        a year (A) with itself, its half year groups and ABE.
+        """
+        if group == 'ABE':
+            return ['*', 'ABE'], ['*']
+        if len(group) == 2:
+            return ['*', group, group[0] + '*'], [group, group[0], 'ABE']
+        return ['*', group[0], group[0] + '*'], [group[0] + '*', 'ABE']
 
-            if time_interval_ != time_interval:
-                continue
-                # Check intersection of classroom with members
-            if classroom_ == classroom or len(set(staff_member_ids) & set(staf_id)):
+    def is_valid_assignment(self, course: Course, classroom: Classroom, staff_member_ids: list[str], time_interval: TimeInterval):
+        if classroom.get_id() in self.classroom_usage[time_interval]:
+            return False
+        staff_usage = self.staff_usage[time_interval]
+        for staff_member_id in staff_member_ids:
+            if staff_member_id in staff_usage:
                 return False
-            
-            if not (event.get_semester() == event_.get_semester()
-                        and are_groups_equal(course_.get_group(), course.get_group())):
+
+        # Courses of the same semester in conflicting groups can only overlap when they are optional
+        # courses of different packages
+        package = course.get_optional_package()
+        usage = self.group_usage[time_interval]
+        for key in self.group_keys[course][1]:
+            packages = usage.get(key)
+            if not packages:
                 continue
-            if course.get_optional_package() is None or course_.get_optional_package() is None:
+            if package is None or packages.get(None) or packages.get(package):
                 return False
-            if (course.get_optional_package() == course_.get_optional_package()):
-                return False
-       
         return True
-    def backtrack(self, course_index=0):
-        if course_index == len(self.courses):
-            return True
-        
-        course = self.courses[course_index]
 
+    def assign(self, course: Course, classroom: Classroom, staff_member_ids: list[str], time_interval: TimeInterval):
+        self.solution.append((course, (classroom, staff_member_ids, time_interval))) # create solution
+        self.keys[course] = order_key(time_interval, staff_member_ids)
+        self.classroom_usage[time_interval].add(classroom.get_id())
+        staff_usage = self.staff_usage[time_interval]
+        for staff_member_id in staff_member_ids:
+            staff_usage[staff_member_id] = staff_usage.get(staff_member_id, 0) + 1
+        usage = self.group_usage[time_interval]
+        package = course.get_optional_package()
+        for key in self.group_keys[course][0]:
+            packages = usage.setdefault(key, {})
+            packages[package] = packages.get(package, 0) + 1
+
+    def unassign(self):
+        """
+        Undoes the last `assign`.
+        """
+        course, (classroom, staff_member_ids, time_interval) = self.solution.pop()
+        del self.keys[course]
+        self.classroom_usage[time_interval].discard(classroom.get_id())
+        staff_usage = self.staff_usage[time_interval]
+        for staff_member_id in staff_member_ids:
+            staff_usage[staff_member_id] -= 1
+            if not staff_usage[staff_member_id]:
+                del staff_usage[staff_member_id]
+        usage = self.group_usage[time_interval]
+        package = course.get_optional_package()
+        for key in self.group_keys[course][0]:
+            packages = usage[key]
+            packages[package] -= 1
+            if not packages[package]:
+                del packages[package]
+
+    def symmetry_weight(self, course: Course, classroom: Classroom, staff_member_ids: list[str], time_interval: TimeInterval) -> int:
+        """
+        Returns the number of symmetric assignments this assignment stands for, 0 if they are explored through another one.
+        """
+        if self.symmetries is None:
+            return 1
+        if not self.symmetries.is_ordered(course, order_key(time_interval, staff_member_ids), self.keys.get):
+            return 0
+        return self.symmetries.classroom_weight(classroom, self.classroom_usage[time_interval])
+
+    def candidates(self, course: Course) -> Iterator[tuple[Classroom, list[str], TimeInterval, int]]:
+        """
+        Yields the valid assignments of `course` with their symmetry weight. Validity is checked
+        when each one is reached, the caller must undo its own assignment before the next one.
+        """
         classrooms = self.lecture_classes if course.get_type() == CourseType.LECTURE else self.laboratory_classes
         for classroom in classrooms:
-            for time_interval in TimeInterval:
+            for time_interval in self.time_intervals:
                 if (course.get_type() == CourseType.LECTURE):
-                    if self.is_valid_assignment(course, classroom, course.get_instructors(), time_interval):
-                        self.solution.append((course, (classroom, course.get_instructors(), time_interval))) # create solution
-                        if self.backtrack(course_index + 1):
-                            return True
-                    
-                        self.solution.pop()
+                    staff_combinations = [course.get_instructors()]
                 else:
-                    for staff_member_id in course.get_instructors():
-                        if self.is_valid_assignment(course, classroom, [staff_member_id], time_interval):
-                            self.solution.append((course, (classroom, [staff_member_id], time_interval))) # create solution
-                        
-                            if self.backtrack(course_index + 1):
-                                return True
-                    
-                            self.solution.pop()
-        return False
-    
-    def backtrack_counting(self, course_index=0):
-        if course_index == len(self.courses):
-            # for solution in self.solution:
-            #     (course, (classroom, ids, interval)) = solution
-            #     event = next(x for x in self.events if course.get_event_id() == x.get_id())
-            #     profs = list(filter(lambda x: any(x.get_id() == s_id for s_id in ids), self.staff_members))
-            #     print(event.get_name(), event.get_semester(), course.get_type(), course.get_group())
-            #     print (classroom.get_id(), interval)
-            #     for prof in profs:
-            #         print (prof.get_name())
-            # print("--------------------")
-            return 1
-        count = 0
+                    staff_combinations = [[staff_member_id] for staff_member_id in course.get_instructors()]
+                for staff_member_ids in staff_combinations:
+                    weight = self.symmetry_weight(course, classroom, staff_member_ids, time_interval)
+                    if weight and self.is_valid_assignment(course, classroom, staff_member_ids, time_interval):
+                        yield classroom, staff_member_ids, time_interval, weight
+
+    def frame(self, course_index: int) -> Frame:
         course = self.courses[course_index]
+        for classroom, staff_member_ids, time_interval, weight in self.candidates(course):
+            self.assign(course, classroom, staff_member_ids, time_interval)
+            yield weight
+            self.unassign()
+            self.failures += 1
+            if self.cutoff is not None and self.failures >= self.cutoff:
+                raise Restart()
 
-        classrooms = self.lecture_classes if course.get_type() == CourseType.LECTURE else self.laboratory_classes
-        for classroom in classrooms:
-            for time_interval in TimeInterval:
-                if (course.get_type() == CourseType.LECTURE):
-                    if self.is_valid_assignment(course, classroom, course.get_instructors(), time_interval):
-                        self.solution.append((course, (classroom, course.get_instructors(), time_interval))) # create solution
-                        count += self.backtrack_counting(course_index + 1)
+    def count_last(self) -> int:
+        return sum(weight for _, _, _, weight in self.candidates(self.courses[-1]))
 
-                        self.solution.pop()
-                else:
-                    for staff_member_id in course.get_instructors():
-                        if self.is_valid_assignment(course, classroom, [staff_member_id], time_interval):
-                            self.solution.append((course, (classroom, [staff_member_id], time_interval))) # create solution
-                        
-                            count += self.backtrack_counting(course_index + 1)
-                    
-                            self.solution.pop()
-        return count
\ No newline at end of file
+    def search_engine(self) -> SearchEngine:
+        """
+        Returns a search over the courses not assigned yet, which follow the assigned ones in `courses`.
+        """
+        return SearchEngine(lambda: self.frame(len(self.solution)), len(self.courses) - len(self.solution),
+                            self.symmetries.multiplier if self.symmetries is not None else 1, self.count_last)
+
+    def backtrack(self) -> bool:
+        return self.search_engine().solve()
+
+    def backtrack_counting(self) -> int:
+        """
+        Counts the schedules. With symmetry breaking every schedule explored stands for
+        a number of symmetric ones, which are counted without being explored.
+        """
+        return self.search_engine().count()
+
+    def solve(self) -> bool:
+        """
+        Runs `backtrack`, starting over with the values in another order each time
+        it reaches the cutoff of the restart schedule, if there is one.
+        """
+        while True:
+            if self.restarts is not None:
+                self.cutoff = self.failures + self.restarts.cutoff(self.runs)
+            try:
+                return self.backtrack()
+            except Restart:
+                while self.solution:
+                    self.unassign()
+                self.runs += 1
+                self.shuffle_values()
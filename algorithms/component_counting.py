@@ -0,0 +1,180 @@
+from bisect import insort
+from typing import Optional
+
+from algorithms.bkt import BKTAlgorithm
+from io_utils.dataset import Dataset
+from models.course import Course, CourseType
+
+# Occupancy of one time interval, as seen by the courses left: number of lecture and laboratory
+# classrooms taken, staff members busy and (semester, group bucket, optional package) present.
+# Packages are stored as 0 for the courses which are not optional, so the keys can be sorted.
+Occupancy = tuple[int, int, tuple[str, ...], tuple[tuple[int, str, int], ...]]
+# The occupancies of all the time intervals, sorted: the time intervals are interchangeable
+State = tuple[Occupancy, ...]
+
+class ComponentCounter:
+    """
+    Counts the schedules `BKTAlgorithm.backtrack_counting` counts, without enumerating them.
+
+    The courses are split into the components of their interaction graph: two courses
+    interact when they can take the same classroom (same type), share a staff member or have
+    conflicting groups of the same semester. The courses of different components never
+    constrain each other, so the count is the product of the counts of the components.
+
+    Within a component the courses are assigned in order and the count of the courses left
+    only depends on the occupancy of the time intervals they can see: how many classrooms of
+    their types are taken, which of their staff members are busy, which of the groups they
+    conflict with are present. `BKTAlgorithm` ignores the availabilities, so the time
+    intervals and the classrooms of a type are interchangeable: the state is the sorted
+    occupancies, and the assignments leading to the same state are counted once, multiplied
+    by the number of time intervals and classrooms they stand for. The counts of the states
+    are cached.
+    """
+    algo: BKTAlgorithm
+    courses: list[Course]
+    lectures: int  # Number of lecture classrooms
+    laboratories: int  # Number of laboratory classrooms
+    components: list[list[Course]]
+    # Of the component being counted, for each position in its order: what the courses from there on can see
+    order: list[Course]
+    staff_seen: list[set[str]]
+    groups_seen: list[set[tuple[int, str]]]
+    types_seen: list[tuple[bool, bool]]
+    cache: dict[tuple[int, State], int]
+
+    def __init__(self, courses: list[Course], dataset: Dataset):
+        self.algo = BKTAlgorithm(courses, dataset, symmetry_breaking=False)
+        self.courses = courses
+        self.lectures = len(self.algo.lecture_classes)
+        self.laboratories = len(self.algo.laboratory_classes)
+        self.components = self.split()
+        self.order = []
+        self.staff_seen = []
+        self.groups_seen = []
+        self.types_seen = []
+        self.cache = {}
+
+    def interact(self, course_i: Course, course_j: Course) -> bool:
+        if course_i.get_type() == course_j.get_type():
+            return True
+        if set(course_i.get_instructors()) & set(course_j.get_instructors()):
+            return True
+        counted_i, conflicting_i = self.algo.group_keys[course_i]
+        counted_j, conflicting_j = self.algo.group_keys[course_j]
+        return bool(set(counted_i) & set(conflicting_j) or set(counted_j) & set(conflicting_i))
+
+    def split(self) -> list[list[Course]]:
+        """
+        The connected components of the interaction graph, each one in the order of `courses`.
+        """
+        parents = list(range(len(self.courses)))
+
+        def find(index: int) -> int:
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+
+        for index_i, course_i in enumerate(self.courses):
+            for index_j in range(index_i + 1, len(self.courses)):
+                if find(index_i) != find(index_j) and self.interact(course_i, self.courses[index_j]):
+                    parents[find(index_j)] = find(index_i)
+        components: dict[int, list[Course]] = {}
+        for index, course in enumerate(self.courses):
+            components.setdefault(find(index), []).append(course)
+        return list(components.values())
+
+    def count(self) -> int:
+        total = 1
+        for component in self.components:
+            total *= self.count_component(component)
+            if not total:
+                break
+        return total
+
+    def count_component(self, component: list[Course]) -> int:
+        self.order = component
+        self.cache = {}
+        # What the courses from each position on can see, built from the end
+        self.staff_seen = [set() for _ in range(len(component) + 1)]
+        self.groups_seen = [set() for _ in range(len(component) + 1)]
+        self.types_seen = [(False, False)] * (len(component) + 1)
+        for position in range(len(component) - 1, -1, -1):
+            course = component[position]
+            self.staff_seen[position] = self.staff_seen[position + 1] | set(course.get_instructors())
+            self.groups_seen[position] = self.groups_seen[position + 1] | set(self.algo.group_keys[course][1])
+            lectures, laboratories = self.types_seen[position + 1]
+            self.types_seen[position] = (lectures or course.get_type() == CourseType.LECTURE,
+                                         laboratories or course.get_type() == CourseType.LABORATORY)
+        empty: Occupancy = (0, 0, (), ())
+        return self.count_from(0, (empty,) * len(self.algo.time_intervals))
+
+    def project(self, position: int, occupancy: Occupancy) -> Occupancy:
+        """
+        Forgets what the courses from `position` on cannot see.
+        """
+        lectures, laboratories, staff, groups = occupancy
+        lectures_seen, laboratories_seen = self.types_seen[position]
+        staff_seen, groups_seen = self.staff_seen[position], self.groups_seen[position]
+        return (lectures if lectures_seen else 0, laboratories if laboratories_seen else 0,
+                tuple(staff_member_id for staff_member_id in staff if staff_member_id in staff_seen),
+                tuple(group for group in groups if group[:2] in groups_seen))
+
+    def place(self, course: Course, occupancy: Occupancy, staff_member_ids: list[str]) -> Optional[Occupancy]:
+        """
+        The occupancy of a time interval once `course` is held there by `staff_member_ids`,
+        or None if it conflicts with the courses already there (like `BKTAlgorithm.is_valid_assignment`).
+        """
+        lectures, laboratories, staff, groups = occupancy
+        if any(staff_member_id in staff for staff_member_id in staff_member_ids):
+            return None
+        package = course.get_optional_package() or 0
+        counted, conflicting = self.algo.group_keys[course]
+        for semester, bucket, other_package in groups:
+            if (semester, bucket) in conflicting and (not package or not other_package or package == other_package):
+                return None
+        if course.get_type() == CourseType.LECTURE:
+            lectures += 1
+        else:
+            laboratories += 1
+        staff = tuple(sorted(staff + tuple(staff_member_ids)))
+        groups = tuple(sorted(set(groups) | {(semester, bucket, package) for semester, bucket in counted}))
+        return lectures, laboratories, staff, groups
+
+    def count_from(self, position: int, state: State) -> int:
+        if position == len(self.order):
+            return 1
+        key = (position, state)
+        count = self.cache.get(key)
+        if count is not None:
+            return count
+
+        course = self.order[position]
+        if course.get_type() == CourseType.LECTURE:
+            staff_combinations = [course.get_instructors()]
+        else:
+            staff_combinations = [[staff_member_id] for staff_member_id in course.get_instructors()]
+        count = 0
+        # Equal occupancies lead to the same states, each distinct one is tried once
+        multiplicities: dict[Occupancy, int] = {}
+        for occupancy in state:
+            multiplicities[occupancy] = multiplicities.get(occupancy, 0) + 1
+        # The state projected for the next course, built once for all the children
+        projected = {occupancy: self.project(position + 1, occupancy) for occupancy in multiplicities}
+        projected_state = sorted(projected[occupancy] for occupancy in state)
+        for occupancy, multiplicity in multiplicities.items():
+            taken = occupancy[0] if course.get_type() == CourseType.LECTURE else occupancy[1]
+            free = (self.lectures if course.get_type() == CourseType.LECTURE else self.laboratories) - taken
+            if free <= 0:
+                continue
+            for staff_member_ids in staff_combinations:
+                placed = self.place(course, occupancy, staff_member_ids)
+                if placed is None:
+                    continue
+                # One time interval of this occupancy takes the course
+                child = list(projected_state)
+                child.remove(projected[occupancy])
+                insort(child, self.project(position + 1, placed))
+                count += multiplicity * free * self.count_from(position + 1, tuple(child))
+        self.cache[key] = count
+        return count
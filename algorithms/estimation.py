@@ -0,0 +1,125 @@
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from decimal import Decimal
+from math import isqrt
+from time import time
+from typing import Optional
+
+from algorithms.bkt import BKTAlgorithm
+from io_utils.dataset import Dataset
+from models.course import Course
+
+# Probes run by a task before it reports back, unless it reaches the deadline first
+PROBES_PER_BATCH = 16
+# Normal quantile of the two sided 95% confidence interval
+Z_95 = Decimal("1.96")
+
+_worker_algorithm: Optional[BKTAlgorithm] = None
+
+def probe(algo: BKTAlgorithm, rng: random.Random) -> int:
+    """
+    Knuth's estimator of the number of schedules counted by `BKTAlgorithm.backtrack_counting`:
+    goes down one random branch of the search tree, picking each child with a probability
+    proportional to its symmetry weight, and returns the product of the total weights of the
+    children met on the way. Its mean over many probes is the exact count.
+    """
+    courses = algo.courses
+    if not courses:
+        return 1
+    estimate = algo.symmetries.multiplier if algo.symmetries is not None else 1
+    try:
+        for course in courses[:-1]:
+            candidates = list(algo.candidates(course))
+            total = sum(weight for _, _, _, weight in candidates)
+            if not total:
+                return 0
+            pick = rng.randrange(total)
+            for classroom, staff_member_ids, time_interval, weight in candidates:
+                if pick < weight:
+                    break
+                pick -= weight
+            algo.assign(course, classroom, staff_member_ids, time_interval)
+            estimate *= total
+        return estimate * algo.count_last()
+    finally:
+        while algo.solution:
+            algo.unassign()
+
+def _start_worker(courses: list[Course], dataset: Dataset, symmetry_breaking: bool):
+    global _worker_algorithm
+    _worker_algorithm = BKTAlgorithm(courses, dataset, symmetry_breaking=symmetry_breaking)
+
+def _probe_batch(seed: int, deadline: float) -> list[int]:
+    """
+    Runs `PROBES_PER_BATCH` probes, fewer if the deadline (a `time.time()`) is reached. At least one is run.
+    """
+    rng = random.Random(seed)
+    estimates = [probe(_worker_algorithm, rng)]
+    while len(estimates) < PROBES_PER_BATCH and time() < deadline:
+        estimates.append(probe(_worker_algorithm, rng))
+    return estimates
+
+class CountEstimate:
+    """
+    The mean of the probes, with the normal 95% confidence interval of the mean.
+    The estimates of the probes vary a lot on large inputs, so the interval is only
+    meaningful after many probes.
+    """
+    probes: int
+    mean: Decimal
+    low: Decimal
+    high: Decimal
+
+    def __init__(self, estimates: list[int]):
+        self.probes = len(estimates)
+        total = sum(estimates)
+        self.mean = Decimal(total) / self.probes
+        error = Decimal(0)
+        if self.probes > 1:
+            # Standard error of the mean, sqrt(variance / probes), computed on integers as the estimates are huge:
+            # probes * variance = (probes * sum of squares - total^2) / (probes - 1)
+            squares = sum(estimate * estimate for estimate in estimates)
+            scaled_variance = (self.probes * squares - total * total) // (self.probes - 1)
+            error = Decimal(isqrt(scaled_variance)) / self.probes
+        self.low = max(Decimal(0), self.mean - Z_95 * error)
+        self.high = self.mean + Z_95 * error
+
+    def __str__(self) -> str:
+        return (f"About {scientific(self.mean)} schedules, 95% confidence interval "
+                f"[{scientific(self.low)}, {scientific(self.high)}], from {self.probes} probes")
+
+def scientific(value: Decimal) -> str:
+    # Decimal writes a zero with the exponent it was computed with
+    return f"{value:.3e}" if value else "0"
+
+def estimate_count(courses: list[Course], dataset: Dataset, workers: Optional[int] = None, time_limit: float = 60.0,
+                   seed: Optional[int] = None, symmetry_breaking: bool = False) -> CountEstimate:
+    """
+    Estimates the result of `BKTAlgorithm.backtrack_counting` with batches of random probes
+    run until the time limit, by a pool of `workers` processes (in this process by default).
+    Symmetry breaking is off by default: the weighted probes it gives vary more, the intervals
+    were several times wider for the same time on the examples.
+    """
+    if not courses:
+        # The empty schedule is the only one, every probe would find it
+        return CountEstimate([1])
+    seeds = random.Random(seed)
+    estimates = []
+    deadline = time() + time_limit
+    if workers is None or workers <= 1:
+        _start_worker(courses, dataset, symmetry_breaking)
+        while not estimates or time() < deadline:
+            estimates += _probe_batch(seeds.randrange(1 << 30), deadline)
+        return CountEstimate(estimates)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker,
+                             initargs=(courses, dataset, symmetry_breaking)) as executor:
+        pending = {executor.submit(_probe_batch, seeds.randrange(1 << 30), deadline) for _ in range(workers)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                estimates += future.result()
+                # A new batch replaces each finished one until the deadline
+                if time() < deadline:
+                    pending.add(executor.submit(_probe_batch, seeds.randrange(1 << 30), deadline))
+    return CountEstimate(estimates)
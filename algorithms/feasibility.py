@@ -0,0 +1,243 @@
+from typing import Hashable, Optional
+
+from io_utils.dataset import Dataset
+from models.classroom import Classroom, ClassroomType
+from models.constraints.constants import Weight
+from models.constraints.unavailable_classroom_time import UnavailableClassroomTime
+from models.constraints.unavailable_staff_time import UnavailableStaffTime
+from models.course import Course, CourseType
+from models.staff_member import StaffMember
+from models.time_interval import TimeInterval
+
+ALL_SLOTS = frozenset(TimeInterval)
+
+def find_hall_violation(courses: list[Course], candidates: dict[Course, list[Hashable]],
+                        capacity: Optional[dict[Hashable, int]] = None) -> Optional[tuple[list[Course], set[Hashable]]]:
+    """
+    Tries to give every course a different candidate (a candidate can be given to `capacity[candidate]`
+    courses, 1 by default) with augmenting paths. When it is not possible, returns a set of courses
+    together with all the candidates they can use, which are too few for them (Hall's condition).
+    """
+    capacity = capacity or {}
+    matched: dict[Hashable, list[Course]] = {}
+
+    def augment(course: Course, seen_courses: set[Course], seen_candidates: set[Hashable]) -> bool:
+        seen_courses.add(course)
+        # A free candidate first, before trying to move the other courses
+        for candidate in candidates[course]:
+            holders = matched.setdefault(candidate, [])
+            if len(holders) < capacity.get(candidate, 1):
+                holders.append(course)
+                return True
+        for candidate in candidates[course]:
+            if candidate in seen_candidates:
+                continue
+            seen_candidates.add(candidate)
+            holders = matched[candidate]
+            for index, holder in enumerate(holders):
+                if holder not in seen_courses and augment(holder, seen_courses, seen_candidates):
+                    holders[index] = course
+                    return True
+        return False
+
+    for course in courses:
+        seen_courses: set[Course] = set()
+        seen_candidates: set[Hashable] = set()
+        if not augment(course, seen_courses, seen_candidates):
+            # Every candidate reached is full and its courses could not move anywhere else
+            return [c for c in courses if c in seen_courses], seen_candidates
+    return None
+
+class FeasibilityAnalyzer:
+    """
+    Cheap necessary conditions checked before searching, so an input without any
+    schedule is reported in milliseconds together with the reason.
+
+    It compares the demand with the capacity of every resource (classrooms of each
+    type, staff members, groups), then checks with bipartite matchings that the
+    courses sharing a resource can get different time intervals, that the courses
+    of each type can get different (classroom, time interval) pairs and that the
+    laboratories can be spread over their staff members. Only the rules the solver
+    enforces are used: lectures of the whole year (group ABE) are left out of the
+    group checks, as `ARCAlgorithm` does not constrain them, and the hard unavailabilities
+    are only taken into account with `availabilities`, `BKTAlgorithm` (and the counters
+    built on it) ignoring them.
+    """
+    courses: list[Course]
+    classrooms: dict[ClassroomType, list[Classroom]]
+    staff_members: list[StaffMember]
+    semesters: dict[Course, int]
+    classroom_slots: dict[str, frozenset[TimeInterval]]  # Available time intervals of each classroom
+    staff_slots: dict[str, frozenset[TimeInterval]]  # Available time intervals of each staff member
+    staff_names: dict[str, str]
+    course_slots: dict[Course, frozenset[TimeInterval]]  # Time intervals a course could be held in
+
+    def __init__(self, courses: list[Course], dataset: Dataset, availabilities: bool = True):
+        classrooms = dataset.classrooms
+        staff_members = dataset.staff_members
+        self.courses = courses
+        self.classrooms = {classroom_type: [classroom for classroom in classrooms if classroom.get_type() == classroom_type]
+                           for classroom_type in (ClassroomType.LECTURE, ClassroomType.LABORATORY)}
+        self.staff_members = staff_members
+        self.semesters = {course: dataset.get_event(course.get_event_id()).get_semester() for course in courses}
+        self.staff_names = {staff_member.get_id(): staff_member.get_name() for staff_member in staff_members}
+
+        unavailable: dict[tuple[type, str], set[TimeInterval]] = {}
+        for constraint in dataset.constraints if availabilities else ():
+            if constraint.get_weight() != Weight.HARD.value:
+                continue
+            if isinstance(constraint, UnavailableClassroomTime):
+                unavailable.setdefault((Classroom, constraint.get_classroom_id()), set()).update(constraint.get_time_intervals())
+            if isinstance(constraint, UnavailableStaffTime):
+                unavailable.setdefault((StaffMember, constraint.get_name()), set()).update(constraint.get_time_intervals())
+        self.classroom_slots = {classroom.get_id(): ALL_SLOTS - unavailable.get((Classroom, classroom.get_id()), set())
+                                for classroom in classrooms}
+        self.staff_slots = {staff_member.get_id(): ALL_SLOTS - unavailable.get((StaffMember, staff_member.get_name()), set())
+                            for staff_member in staff_members}
+
+        self.course_slots = {}
+        for course in courses:
+            rooms = frozenset().union(*(self.classroom_slots[classroom.get_id()] for classroom in self.course_classrooms(course)))
+            if course.get_type() == CourseType.LECTURE:
+                staff = ALL_SLOTS.intersection(*(self.staff_slots[staff_id] for staff_id in course.get_instructors()))
+            else:
+                staff = frozenset().union(*(self.staff_slots[staff_id] for staff_id in course.get_instructors()))
+            self.course_slots[course] = rooms & staff
+
+    def course_classrooms(self, course: Course) -> list[Classroom]:
+        return self.classrooms[ClassroomType.LECTURE if course.get_type() == CourseType.LECTURE else ClassroomType.LABORATORY]
+
+    def describe(self, course: Course) -> str:
+        return f"{course.get_event_id()} {course.get_type().value} {course.get_group()}"
+
+    def staff_courses(self) -> dict[str, list[Course]]:
+        """
+        The courses which need each staff member: the lectures they teach and the
+        laboratories nobody else can hold.
+        """
+        needs: dict[str, list[Course]] = {staff_id: [] for staff_id in self.staff_slots}
+        for course in self.courses:
+            if course.get_type() == CourseType.LECTURE or len(course.get_instructors()) == 1:
+                for staff_id in course.get_instructors():
+                    needs[staff_id].append(course)
+        return needs
+
+    def group_courses(self) -> dict[str, list[Course]]:
+        """
+        Sets of courses which must all be held in different time intervals because of their
+        groups: for each semester and group, the courses of the group and of its half year.
+        Optional courses of different packages can overlap, so each package makes its own set.
+        """
+        cliques: dict[str, list[Course]] = {}
+        keys = {(self.semesters[course], course.get_group()) for course in self.courses if course.get_group() != "ABE"}
+        for semester, group in sorted(keys):
+            members = [course for course in self.courses
+                       if self.semesters[course] == semester and course.get_group() in (group, group[0])]
+            mandatory = [course for course in members if course.get_optional_package() is None]
+            packages = sorted({course.get_optional_package() for course in members} - {None})
+            for package in packages or [None]:
+                name = f"group {group} of semester {semester}" + (f" with optional package {package}" if package else "")
+                cliques[name] = mandatory + [course for course in members if package and course.get_optional_package() == package]
+        return cliques
+
+    def check_instructors(self) -> list[str]:
+        return [f"{self.describe(course)} has no instructor." for course in self.courses if not course.get_instructors()]
+
+    def check_classroom_capacity(self) -> list[str]:
+        explanations = []
+        for classroom_type, classrooms in self.classrooms.items():
+            demand = sum(1 for course in self.courses if course.get_type().value == classroom_type.value)
+            capacity = sum(len(self.classroom_slots[classroom.get_id()]) for classroom in classrooms)
+            if demand > capacity:
+                explanations.append(f"{demand} {classroom_type.value.lower()} courses need a classroom, but the "
+                                    f"{len(classrooms)} {classroom_type.value.lower()} classrooms are available "
+                                    f"for only {capacity} (classroom, time interval) pairs.")
+        return explanations
+
+    def check_staff_capacity(self) -> list[str]:
+        explanations = []
+        for staff_id, courses in self.staff_courses().items():
+            available = len(self.staff_slots[staff_id])
+            if len(courses) > available:
+                explanations.append(f"{self.staff_names[staff_id]} must teach {len(courses)} courses, "
+                                    f"but is available in only {available} time intervals.")
+        return explanations
+
+    def check_group_capacity(self) -> list[str]:
+        return [f"The {name} has {len(courses)} courses, but there are only {len(TimeInterval)} time intervals."
+                for name, courses in self.group_courses().items() if len(courses) > len(TimeInterval)]
+
+    def check_course_slots(self) -> list[str]:
+        """
+        Matches the courses needing the same staff member or group with different time intervals.
+        """
+        explanations = [f"{self.describe(course)} has no time interval in which a classroom and its staff are available."
+                        for course in self.courses if not self.course_slots[course]]
+        if explanations:
+            return explanations
+
+        cliques = {f"the courses of {self.staff_names[staff_id]}": courses for staff_id, courses in self.staff_courses().items()}
+        cliques.update((f"the {name}", courses) for name, courses in self.group_courses().items())
+        candidates = {course: sorted(slots, key=lambda slot: slot.value) for course, slots in self.course_slots.items()}
+        for name, courses in cliques.items():
+            violation = find_hall_violation(courses, candidates)
+            if violation is not None:
+                stuck, slots = violation
+                explanations.append(f"{len(stuck)} of {name} can only be held in {len(slots)} time intervals "
+                                    f"({', '.join(slot.name for slot in sorted(slots, key=lambda slot: slot.value))}): "
+                                    f"{', '.join(self.describe(course) for course in stuck)}.")
+        return explanations
+
+    def check_classroom_matching(self) -> list[str]:
+        """
+        Matches the courses of each type with different (classroom, time interval) pairs.
+        """
+        explanations = []
+        for classroom_type, classrooms in self.classrooms.items():
+            courses = [course for course in self.courses if course.get_type().value == classroom_type.value]
+            candidates = {course: [(classroom.get_id(), slot) for classroom in classrooms
+                                   for slot in sorted(self.classroom_slots[classroom.get_id()] & self.course_slots[course], key=lambda slot: slot.value)]
+                          for course in courses}
+            violation = find_hall_violation(courses, candidates)
+            if violation is not None:
+                stuck, pairs = violation
+                explanations.append(f"{len(stuck)} {classroom_type.value.lower()} courses can only use "
+                                    f"{len(pairs)} (classroom, time interval) pairs between them: "
+                                    f"{', '.join(self.describe(course) for course in stuck)}.")
+        return explanations
+
+    def check_staff_matching(self) -> list[str]:
+        """
+        Matches the laboratories with their staff members, each staff member holding at most
+        as many courses as the time intervals left to them by their lectures.
+        """
+        lectures = {staff_id: 0 for staff_id in self.staff_slots}
+        for course in self.courses:
+            if course.get_type() == CourseType.LECTURE:
+                for staff_id in course.get_instructors():
+                    lectures[staff_id] += 1
+        capacity = {staff_id: len(slots) - lectures[staff_id] for staff_id, slots in self.staff_slots.items()}
+        laboratories = [course for course in self.courses if course.get_type() == CourseType.LABORATORY]
+        candidates = {course: [staff_id for staff_id in course.get_instructors() if capacity[staff_id] > 0]
+                      for course in laboratories}
+        violation = find_hall_violation(laboratories, candidates, capacity)
+        if violation is None:
+            return []
+        stuck, staff_ids = violation
+        names = ', '.join(self.staff_names[staff_id] for staff_id in sorted(staff_ids))
+        return [f"{len(stuck)} laboratories can only be held by {names or 'nobody'}, who together have "
+                f"{sum(capacity[staff_id] for staff_id in staff_ids)} free time intervals left after their lectures."]
+
+    def analyze(self) -> list[str]:
+        """
+        Returns why no schedule can exist, or an empty list when every check passed
+        (which does not mean a schedule exists). The checks stop at the first one failing.
+        """
+        checks = [self.check_instructors, self.check_classroom_capacity, self.check_staff_capacity,
+                  self.check_group_capacity, self.check_course_slots, self.check_classroom_matching,
+                  self.check_staff_matching]
+        for check in checks:
+            explanations = check()
+            if explanations:
+                return explanations
+        return []
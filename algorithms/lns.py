@@ -0,0 +1,142 @@
+import contextlib
+import io
+import random
+from time import perf_counter
+from typing import Callable, Optional
+
+from algorithms.arc import ARCAlgorithm, AssignmentType
+from algorithms.soft_constraints import SoftConstraints
+from io_utils.dataset import Dataset
+from models import slots
+from models.course import Course
+
+# Kinds of regions `LargeNeighborhoodSearch` destroys
+REGIONS = ["day", "instructor", "group"]
+
+class LargeNeighborhoodSearch:
+    """
+    Schedules more courses than the complete searches can, the whole faculty at once, by
+    repeatedly destroying a region of the timetable and repairing it with `ARCAlgorithm`.
+    A region is the courses of one day, of one instructor or of one group of a semester
+    (with the lectures of its year). The repair searches new values for them, and for a few
+    courses not scheduled yet, with every other course fixed, and gives up after `node_limit`
+    nodes: the regions stay small enough for the propagation and the backtracking to be fast.
+
+    The timetable starts empty, so the first repairs schedule the groups one after the other.
+    A repair is kept if it does not make the timetable worse: fewer courses left unscheduled
+    first, then a lower cost of the soft constraints (see `SoftConstraints`). `on_improvement`
+    is called with every better timetable, the courses still unscheduled left out.
+    """
+    courses: list[Course]
+    dataset: Dataset
+    propagator: str
+    variable_ordering: str
+    time_limit: float  # In seconds
+    node_limit: int  # Nodes of each repair
+    rng: random.Random
+    soft_constraints: SoftConstraints
+    on_improvement: Optional[Callable[[list[tuple[Course, AssignmentType]]], None]]
+    semesters: dict[Course, int]
+    solution: dict[Course, AssignmentType]  # The courses scheduled so far
+    unassigned: list[Course]
+    cost: int  # Cost of the soft constraints of `solution`
+    repairs: int  # Number of repairs tried
+    kept: int  # Number of repairs kept
+
+    # Courses not scheduled yet added to each repair, besides the ones of the region
+    UNASSIGNED_PER_REPAIR = 3
+
+    def __init__(self, courses: list[Course], dataset: Dataset, propagator: str = "ac2001",
+                 variable_ordering: str = "dom-wdeg", time_limit: float = 60.0, node_limit: int = 1000,
+                 seed: Optional[int] = None,
+                 on_improvement: Optional[Callable[[list[tuple[Course, AssignmentType]]], None]] = None):
+        self.courses = courses
+        self.dataset = dataset
+        self.propagator = propagator
+        self.variable_ordering = variable_ordering
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.rng = random.Random(seed)
+        self.soft_constraints = SoftConstraints(courses, dataset)
+        self.on_improvement = on_improvement
+        self.semesters = {course: dataset.get_event(course.get_event_id()).get_semester() for course in courses}
+        self.solution = {}
+        self.unassigned = list(courses)
+        self.cost = 0
+        self.repairs = 0
+        self.kept = 0
+
+    def region(self) -> list[Course]:
+        """
+        The courses of a random region, scheduled or not.
+        """
+        kind = self.rng.choice(REGIONS)
+        if kind == "day":
+            day = self.rng.randrange(slots.DAYS)
+            return [course for course, (_, _, time_interval) in self.solution.items()
+                    if slots.day(time_interval) == day]
+        if kind == "instructor":
+            course = self.rng.choice(self.courses)
+            instructor = self.rng.choice(course.get_instructors())
+            return [course for course in self.courses
+                    if instructor in (self.solution[course][1] if course in self.solution else course.get_instructors())]
+        course = self.rng.choice(self.courses)
+        semester, year = self.semesters[course], course.get_group()[0]
+        return [other for other in self.courses
+                if self.semesters[other] == semester and (other.get_group()[0] == year or other.get_group() == "ABE")]
+
+    def repair(self, free: list[Course]) -> Optional[dict[Course, AssignmentType]]:
+        """
+        Searches values for the courses of `free`, compatible with the other scheduled courses.
+        Returns None if there are none or if the search reached the node limit.
+        """
+        free_set = set(free)
+        fixed = [(course, assignment) for course, assignment in self.solution.items() if course not in free_set]
+        algo = ARCAlgorithm(free, self.dataset, propagator=self.propagator, variable_ordering=self.variable_ordering,
+                            value_ordering="cost", symmetry_breaking=False, seed=self.rng.randrange(1 << 30),
+                            soft_constraints=self.soft_constraints, fixed=fixed)
+        # The preprocessing reports the regions it finds infeasible
+        with contextlib.redirect_stdout(io.StringIO()):
+            domains = algo.preprocess()
+        if domains is None:
+            return None
+        algo.start_search(domains)
+        assignment = {}
+        if not algo.search_engine(assignment, domains).solve(self.node_limit):
+            return None
+        return {course: algo.values[assignment[course]] for course in free}
+
+    def solve(self) -> bool:
+        """
+        Destroys and repairs regions until the time limit, or until every course is scheduled
+        without breaking a soft constraint. Returns whether every course is scheduled.
+        """
+        time_start = perf_counter()
+        while perf_counter() - time_start < self.time_limit and (self.unassigned or self.cost):
+            region = self.region()
+            region_set = set(region)
+            others = [course for course in self.unassigned if course not in region_set]
+            free = region + self.rng.sample(others, min(self.UNASSIGNED_PER_REPAIR, len(others)))
+            if not free:
+                continue
+            self.repairs += 1
+            repaired = self.repair(free)
+            if repaired is None:
+                continue
+            old_cost = sum(self.soft_constraints.cost(course, self.solution[course]) for course in free if course in self.solution)
+            cost = self.cost - old_cost + sum(self.soft_constraints.cost(course, assignment) for course, assignment in repaired.items())
+            unassigned = [course for course in self.unassigned if course not in repaired]
+            if (len(unassigned), cost) > (len(self.unassigned), self.cost):
+                continue
+            improved = (len(unassigned), cost) < (len(self.unassigned), self.cost)
+            self.solution.update(repaired)
+            self.unassigned, self.cost = unassigned, cost
+            self.kept += 1
+            if improved:
+                print(f"{len(self.unassigned)} courses left, cost {self.cost} after {perf_counter() - time_start:.2f}s")
+                if self.on_improvement is not None:
+                    self.on_improvement(self.timetable())
+        return not self.unassigned
+
+    def timetable(self) -> list[tuple[Course, AssignmentType]]:
+        return [(course, self.solution[course]) for course in self.courses if course in self.solution]
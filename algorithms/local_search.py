@@ -0,0 +1,254 @@
+import math
+import random
+from time import perf_counter
+from typing import Optional
+
+from algorithms.arc import ARCAlgorithm
+from algorithms.bitset import iter_bits
+from algorithms.soft_constraints import SoftConstraints
+from models import slots
+from models.course import Course
+from models.time_interval import TimeInterval
+
+# A change of the timetable: the new value of one course (a move) or of two courses (a swap)
+Change = list[tuple[int, int]]  # (course index, value)
+
+# Methods choosing the next change, see `LocalSearch`
+LOCAL_SEARCH_METHODS = ["tabu", "annealing"]
+
+class LocalSearch:
+    """
+    Improves a timetable found by `ARCAlgorithm` until the time limit. Its cost is the cost of
+    the soft constraints (see `SoftConstraints`), plus `GAP_COST` for every free time interval
+    between two courses of an instructor in a day and `LATE_COST` for every course held in the
+    last time interval of a day.
+
+    The neighbors of a timetable are the moves, giving a course another value of its domain
+    (any classroom, time interval and staff member), and the swaps, exchanging the time
+    intervals of two courses which keep their classroom and staff members. A change is only
+    made if the courses stay in their preprocessed domains and compatible with the courses
+    of their new time interval, so every timetable visited respects the hard constraints.
+
+    The cost is not recomputed after a change: the cost of the values is cached and the gaps
+    are counted again only for the (staff member, day) pairs the change touches.
+
+    "tabu" makes the best change out of `CANDIDATES` random ones, even if it costs more,
+    without giving back a course a value it had in the last `TABU_TENURE` changes, unless
+    this beats the best timetable. "annealing" makes random changes, accepting the worse ones
+    with a probability falling with the temperature, which cools from `START_TEMPERATURE`
+    to `END_TEMPERATURE` over the time limit.
+    """
+    algo: ARCAlgorithm
+    soft_constraints: SoftConstraints
+    method: str  # One of `LOCAL_SEARCH_METHODS`
+    time_limit: float  # In seconds
+    rng: random.Random
+    courses: list[Course]
+    domains: list[int]  # Preprocessed domain of each course
+    domain_values: list[list[int]]  # The values of `domains`
+    value_costs: dict[tuple[int, int], int]  # (course index, value) -> cost of the value alone, filled when needed
+    value_busy: list[tuple[tuple[int, int], ...]]  # (staff member, day) pairs each value keeps busy
+    value_hours: list[int]  # Index of the time interval of each value in its day
+    current: list[int]  # Value of each course
+    slot_courses: dict[TimeInterval, set[int]]  # Courses held in each time interval
+    busy: dict[tuple[int, int], list[int]]  # Number of courses of a staff member in each time interval of a day
+    cost: int
+    best_cost: int
+    best_solution: list
+    changes: int  # Number of changes made
+
+    GAP_COST = 1
+    LATE_COST = 1
+    LATE_HOUR = slots.HOURS - 1  # The 18:00-20:00 time interval
+    CANDIDATES = 50
+    TABU_TENURE = 10
+    START_TEMPERATURE = 20.0
+    END_TEMPERATURE = 0.1
+    # Changes tried between two checks of the time limit
+    CHANGES_PER_CHECK = 100
+
+    def __init__(self, algo: ARCAlgorithm, method: str = "tabu", time_limit: float = 60.0,
+                 seed: Optional[int] = None, soft_constraints: Optional[SoftConstraints] = None):
+        self.algo = algo
+        self.soft_constraints = soft_constraints or algo.soft_constraints or SoftConstraints(algo.courses, algo.dataset)
+        self.method = method
+        self.time_limit = time_limit
+        self.rng = random.Random(seed)
+        self.courses = algo.courses
+        self.domains = [algo.initial_domains[course] for course in self.courses]
+        self.domain_values = [list(iter_bits(domain)) for domain in self.domains]
+        self.value_costs = {}
+        self.value_busy = []
+        self.value_hours = []
+        for staff, time_interval in zip(algo.value_staff, algo.value_slots):
+            day, hour = slots.day(time_interval), slots.hour(time_interval)
+            self.value_busy.append(tuple((staff_member, day) for staff_member in iter_bits(staff)))
+            self.value_hours.append(hour)
+
+        values = {course: algo.value_ids[(classroom.get_id(), tuple(staff_member_ids), time_interval)]
+                  for course, (classroom, staff_member_ids, time_interval) in algo.solution}
+        self.current = [values[course] for course in self.courses]
+        self.slot_courses = {time_interval: set() for time_interval in TimeInterval}
+        self.busy = {}
+        for course_index, value in enumerate(self.current):
+            self.slot_courses[algo.value_slots[value]].add(course_index)
+            self.occupy(value, 1)
+        self.cost = (sum(self.value_cost(course_index, value) for course_index, value in enumerate(self.current))
+                     + sum(self.gaps(key) for key in self.busy) * self.GAP_COST)
+        self.best_cost = self.cost
+        self.best_solution = list(algo.solution)
+        self.changes = 0
+
+    def value_cost(self, course_index: int, value: int) -> int:
+        cost = self.value_costs.get((course_index, value))
+        if cost is None:
+            cost = self.soft_constraints.cost(self.courses[course_index], self.algo.values[value])
+            if self.value_hours[value] == self.LATE_HOUR:
+                cost += self.LATE_COST
+            self.value_costs[(course_index, value)] = cost
+        return cost
+
+    def occupy(self, value: int, step: int):
+        hour = self.value_hours[value]
+        for key in self.value_busy[value]:
+            hours = self.busy.get(key)
+            if hours is None:
+                hours = self.busy[key] = [0] * slots.HOURS
+            hours[hour] += step
+
+    def gaps(self, key: tuple[int, int]) -> int:
+        """
+        Number of free time intervals between the first and the last course of a staff member in a day.
+        """
+        hours = [hour for hour, courses in enumerate(self.busy[key]) if courses]
+        if not hours:
+            return 0
+        return hours[-1] - hours[0] + 1 - len(hours)
+
+    def is_feasible(self, change: Change) -> bool:
+        algo = self.algo
+        moved = {course_index for course_index, _ in change}
+        for course_index, value in change:
+            if not (self.domains[course_index] >> value) & 1:
+                return False
+            course = self.courses[course_index]
+            for other_index in self.slot_courses[algo.value_slots[value]]:
+                if other_index not in moved and not algo.are_compatible(
+                        value, self.current[other_index], course, self.courses[other_index]):
+                    return False
+        if len(change) == 2:
+            (index_i, value_i), (index_j, value_j) = change
+            return algo.are_compatible(value_i, value_j, self.courses[index_i], self.courses[index_j])
+        return True
+
+    def delta(self, change: Change) -> int:
+        """
+        The cost of the timetable after `change` minus its current cost.
+        """
+        delta = 0
+        touched = set()
+        for course_index, value in change:
+            old_value = self.current[course_index]
+            delta += self.value_cost(course_index, value) - self.value_cost(course_index, old_value)
+            touched.update(self.value_busy[old_value])
+            touched.update(self.value_busy[value])
+        if not touched:
+            return delta
+        gaps = sum(self.gaps(key) for key in touched if key in self.busy)
+        for course_index, value in change:
+            self.occupy(self.current[course_index], -1)
+            self.occupy(value, 1)
+        delta += (sum(self.gaps(key) for key in touched) - gaps) * self.GAP_COST
+        for course_index, value in change:
+            self.occupy(value, -1)
+            self.occupy(self.current[course_index], 1)
+        return delta
+
+    def apply(self, change: Change, delta: int):
+        value_slots = self.algo.value_slots
+        for course_index, value in change:
+            old_value = self.current[course_index]
+            self.slot_courses[value_slots[old_value]].discard(course_index)
+            self.occupy(old_value, -1)
+            self.slot_courses[value_slots[value]].add(course_index)
+            self.occupy(value, 1)
+            self.current[course_index] = value
+        self.cost += delta
+        self.changes += 1
+
+    def random_change(self) -> Optional[Change]:
+        """
+        A random move, or half of the time a random swap. None if the swap does not exist:
+        the time interval of the other course is not in the domain with the same classroom and staff.
+        """
+        course_index = self.rng.randrange(len(self.courses))
+        if self.rng.random() < 0.5:
+            return [(course_index, self.rng.choice(self.domain_values[course_index]))]
+        other_index = self.rng.randrange(len(self.courses))
+        value, other_value = self.current[course_index], self.current[other_index]
+        if self.algo.value_slots[value] == self.algo.value_slots[other_value]:
+            return None
+        swapped = self.swapped_value(value, other_value)
+        other_swapped = self.swapped_value(other_value, value)
+        if swapped is None or other_swapped is None:
+            return None
+        return [(course_index, swapped), (other_index, other_swapped)]
+
+    def swapped_value(self, value: int, other_value: int) -> Optional[int]:
+        """
+        The value with the classroom and staff members of `value` in the time interval of `other_value`.
+        """
+        classroom, staff_member_ids, _ = self.algo.values[value]
+        return self.algo.value_ids.get((classroom.get_id(), tuple(staff_member_ids), self.algo.value_slots[other_value]))
+
+    def tabu_step(self, tabu: dict[tuple[int, int], int]):
+        best_change, best_delta = None, None
+        for _ in range(self.CANDIDATES):
+            change = self.random_change()
+            if change is None or not self.is_feasible(change):
+                continue
+            delta = self.delta(change)
+            if best_delta is not None and delta >= best_delta:
+                continue
+            # Aspiration: a tabu change is allowed if it beats the best timetable
+            if (any(tabu.get(key, -1) >= self.changes for key in change)
+                    and self.cost + delta >= self.best_cost):
+                continue
+            best_change, best_delta = change, delta
+        if best_change is None:
+            return
+        for course_index, _ in best_change:
+            tabu[(course_index, self.current[course_index])] = self.changes + self.TABU_TENURE
+        self.apply(best_change, best_delta)
+
+    def annealing_step(self, temperature: float):
+        change = self.random_change()
+        if change is None or not self.is_feasible(change):
+            return
+        delta = self.delta(change)
+        if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+            self.apply(change, delta)
+
+    def solve(self) -> int:
+        """
+        Searches until the time limit, or until the cost is 0, printing the cost of every
+        better timetable found. Returns the best cost, its timetable is `best_solution`.
+        """
+        time_start = perf_counter()
+        tabu: dict[tuple[int, int], int] = {}  # (course index, value) -> last change it is tabu for
+        print(f"Cost {self.cost} at the start")
+        while self.best_cost > 0:
+            elapsed = perf_counter() - time_start
+            if elapsed >= self.time_limit:
+                break
+            temperature = self.START_TEMPERATURE * (self.END_TEMPERATURE / self.START_TEMPERATURE) ** (elapsed / self.time_limit)
+            for _ in range(self.CHANGES_PER_CHECK):
+                if self.method == "tabu":
+                    self.tabu_step(tabu)
+                else:
+                    self.annealing_step(temperature)
+                if self.cost < self.best_cost:
+                    self.best_cost = self.cost
+                    self.best_solution = [(course, self.algo.values[value]) for course, value in zip(self.courses, self.current)]
+                    print(f"Cost {self.best_cost} after {perf_counter() - time_start:.2f}s")
+        return self.best_cost
@@ -0,0 +1,183 @@
+import random
+from time import perf_counter
+from typing import Optional
+
+from algorithms.arc import ARCAlgorithm, AssignmentType
+from algorithms.bitset import iter_bits
+from io_utils.dataset import Dataset
+from models.course import Course
+from models import slots
+
+class MinConflicts:
+    """
+    Repairs a timetable which may break the hard constraints instead of searching a tree:
+    every course gets a value of its domain (see `ARCAlgorithm.initialize_domains`), greedily
+    at first, then a course in conflict is picked at random and given the value conflicting
+    with the fewest other courses, until there is no conflict left or the time limit is reached.
+    With probability `NOISE` the value is picked at random instead, to leave the plateaus.
+
+    The conflicts of a value are read from counters kept up to date at each change: courses
+    per (time interval, classroom), per (time interval, staff member) and per (time interval,
+    semester, group), so a step costs the size of the domain and of the time intervals left
+    and taken, not a scan of every pair of courses. Groups conflict like in `ARCAlgorithm`:
+    a year (A) with itself and its half years (A1), a half year with itself, ABE with none.
+    """
+    algo: ARCAlgorithm
+    courses: list[Course]
+    time_limit: float  # In seconds
+    rng: random.Random
+    domain_values: list[list[int]]  # The values of the domain of each course
+    value_slots: list[int]  # Index of the time interval of each value
+    value_classrooms: list[int]  # Indexed by slot * classrooms + classroom
+    value_staff: list[tuple[int, ...]]  # Indexed by slot * staff members + staff member
+    group_keys: list[Optional[tuple[int, str, bool]]]  # (semester, letter, half year) of each course, None for ABE
+    classroom_usage: list[int]
+    staff_usage: list[int]
+    year_usage: dict[tuple[int, int, str], int]  # (slot, semester, letter) -> courses of the year
+    half_usage: dict[tuple[int, int, str], int]  # (slot, semester, group) -> courses of the half year
+    halves_usage: dict[tuple[int, int, str], int]  # (slot, semester, letter) -> courses of all the half years
+    current: list[Optional[int]]  # Value of each course, None before the greedy assignment
+    slot_courses: list[set[int]]  # Courses in each time interval
+    conflicted: set[int]  # Courses in conflict with another one
+    steps: int
+    solution: list[tuple[Course, AssignmentType]]
+
+    NOISE = 0.05
+    # Steps between two checks of the time limit
+    STEPS_PER_CHECK = 100
+
+    def __init__(self, courses: list[Course], dataset: Dataset, time_limit: float = 60.0, seed: Optional[int] = None):
+        self.algo = ARCAlgorithm(courses, dataset, symmetry_breaking=False)
+        self.courses = courses
+        self.time_limit = time_limit
+        self.rng = random.Random(seed)
+        self.steps = 0
+        self.solution = []
+
+    def start(self):
+        algo = self.algo
+        algo.apply_global_hard_constraints()
+        domains = algo.initialize_domains()
+        algo.precompute_compatibility()
+        classrooms = len(algo.lecture_classes) + len(algo.laboratory_classes)
+        staff_members = len(algo.staff_members)
+        self.domain_values = [list(iter_bits(domains[course])) for course in self.courses]
+        self.value_slots = algo.value_slot_ids
+        self.value_classrooms = [slot * classrooms + classroom for slot, classroom in zip(self.value_slots, algo.value_classrooms)]
+        self.value_staff = [tuple(slot * staff_members + staff_member for staff_member in iter_bits(staff))
+                            for slot, staff in zip(self.value_slots, algo.value_staff)]
+        self.group_keys = [None if course.get_group() == "ABE"
+                           else (algo.semesters[course], course.get_group()[0], len(course.get_group()) == 2)
+                           for course in self.courses]
+        self.classroom_usage = [0] * (slots.SLOT_COUNT * classrooms)
+        self.staff_usage = [0] * (slots.SLOT_COUNT * staff_members)
+        self.year_usage = {}
+        self.half_usage = {}
+        self.halves_usage = {}
+        self.current = [None] * len(self.courses)
+        self.slot_courses = [set() for _ in range(slots.SLOT_COUNT)]
+        self.conflicted = set()
+
+    def group_conflicts(self, course_index: int, slot: int) -> int:
+        """
+        Number of courses in the time interval whose groups conflict with the group of the course.
+        """
+        key = self.group_keys[course_index]
+        if key is None:
+            return 0
+        semester, letter, half = key
+        if half:
+            return self.year_usage.get((slot, semester, letter), 0) + self.half_usage.get((slot, semester, self.courses[course_index].get_group()), 0)
+        # A year conflicts with itself and every half year of the letter
+        return self.year_usage.get((slot, semester, letter), 0) + self.halves_usage.get((slot, semester, letter), 0)
+
+    def conflicts(self, course_index: int, value: int) -> int:
+        """
+        Number of courses in the counters the course would conflict with, taking `value`.
+        """
+        conflicts = self.classroom_usage[self.value_classrooms[value]]
+        for key in self.value_staff[value]:
+            conflicts += self.staff_usage[key]
+        return conflicts + self.group_conflicts(course_index, self.value_slots[value])
+
+    def count(self, course_index: int, value: int, step: int):
+        slot = self.value_slots[value]
+        self.classroom_usage[self.value_classrooms[value]] += step
+        for key in self.value_staff[value]:
+            self.staff_usage[key] += step
+        group_key = self.group_keys[course_index]
+        if group_key is not None:
+            semester, letter, half = group_key
+            key = (slot, semester, letter)
+            if half:
+                self.halves_usage[key] = self.halves_usage.get(key, 0) + step
+                key = (slot, semester, self.courses[course_index].get_group())
+                self.half_usage[key] = self.half_usage.get(key, 0) + step
+            else:
+                self.year_usage[key] = self.year_usage.get(key, 0) + step
+        if step > 0:
+            self.slot_courses[slot].add(course_index)
+        else:
+            self.slot_courses[slot].discard(course_index)
+
+    def assign(self, course_index: int):
+        """
+        Gives the course the value with the fewest conflicts (ties broken at random),
+        or a random value with probability `NOISE`. The course must be left out of the counters.
+        """
+        values = self.domain_values[course_index]
+        if self.current[course_index] is not None and self.rng.random() < self.NOISE:
+            value = self.rng.choice(values)
+        else:
+            best, best_values = None, []
+            for value in values:
+                conflicts = self.conflicts(course_index, value)
+                if best is None or conflicts < best:
+                    best, best_values = conflicts, [value]
+                elif conflicts == best:
+                    best_values.append(value)
+            value = self.rng.choice(best_values)
+        self.current[course_index] = value
+        self.count(course_index, value, 1)
+
+    def update_conflicted(self, slot: int):
+        for course_index in self.slot_courses[slot]:
+            value = self.current[course_index]
+            # The course itself is counted once for its classroom, each staff member and its group
+            own = 1 + len(self.value_staff[value]) + (self.group_keys[course_index] is not None)
+            if self.conflicts(course_index, value) > own:
+                self.conflicted.add(course_index)
+            else:
+                self.conflicted.discard(course_index)
+
+    def solve(self) -> bool:
+        """
+        Repairs the timetable until it has no conflict (True) or the time limit is reached (False).
+        """
+        time_start = perf_counter()
+        self.start()
+        if not all(self.domain_values):
+            print("A course has no possible value.")
+            return False
+        # Greedy start, the courses with the fewest values first
+        for course_index in sorted(range(len(self.courses)), key=lambda index: len(self.domain_values[index])):
+            self.assign(course_index)
+        for slot in range(len(self.slot_courses)):
+            self.update_conflicted(slot)
+        print(f"{len(self.conflicted)} courses in conflict after the greedy assignment")
+
+        while self.conflicted:
+            if self.steps % self.STEPS_PER_CHECK == 0 and perf_counter() - time_start >= self.time_limit:
+                print(f"{len(self.conflicted)} courses still in conflict after {self.steps} steps.")
+                return False
+            self.steps += 1
+            course_index = self.rng.choice(tuple(self.conflicted))
+            old_value = self.current[course_index]
+            self.count(course_index, old_value, -1)
+            self.assign(course_index)
+            self.update_conflicted(self.value_slots[old_value])
+            self.update_conflicted(self.value_slots[self.current[course_index]])
+
+        self.solution = [(course, self.algo.values[value]) for course, value in zip(self.courses, self.current)]
+        print(f"Solution found after {self.steps} steps.")
+        return True
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+from typing import Optional
+
+from models.course import Course
+
+Nogood = frozenset[tuple[Course, int]]  # (course, value) pairs which cannot all hold together
+
+class NogoodStore:
+    """
+    A bounded store of nogoods learned by `ARCAlgorithm.backtrack`.
+
+    Each nogood is watched by one of its (course, value) pairs, the one assigned last
+    when it was learned. Assigning that pair looks up the nogoods it watches and checks
+    whether the rest of them holds. Once `capacity` nogoods are stored the least recently
+    used one is evicted.
+    """
+    capacity: int
+    nogoods: OrderedDict[Nogood, tuple[Course, int]]  # Nogood -> watched pair
+    watches: dict[tuple[Course, int], set[Nogood]]
+
+    def __init__(self, capacity: int = 10_000):
+        self.capacity = capacity
+        self.nogoods = OrderedDict()
+        self.watches = {}
+
+    def __len__(self) -> int:
+        return len(self.nogoods)
+
+    def add(self, nogood: Nogood, watched: tuple[Course, int]):
+        if self.capacity <= 0:
+            return
+        if nogood in self.nogoods:
+            self.nogoods.move_to_end(nogood)
+            return
+        self.nogoods[nogood] = watched
+        self.watches.setdefault(watched, set()).add(nogood)
+        if len(self.nogoods) > self.capacity:
+            evicted, evicted_watch = self.nogoods.popitem(last=False)
+            watching = self.watches[evicted_watch]
+            watching.discard(evicted)
+            if not watching:
+                del self.watches[evicted_watch]
+
+    def find(self, course: Course, value: int, assignment: dict[Course, int]) -> Optional[Nogood]:
+        """
+        Returns a nogood violated by `assignment` once `course` takes `value`, if there is one.
+        """
+        for nogood in self.watches.get((course, value), ()):
+            if all(other == course or assignment.get(other) == other_value for other, other_value in nogood):
+                self.nogoods.move_to_end(nogood)
+                return nogood
+        return None
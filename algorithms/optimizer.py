@@ -0,0 +1,132 @@
+from bisect import bisect_left
+from time import perf_counter
+from typing import Optional
+
+from algorithms.arc import ARCAlgorithm, DomainType
+from algorithms.bitset import bit
+from algorithms.search_engine import Frame, SearchEngine
+from algorithms.soft_constraints import SoftConstraints
+from io_utils.dataset import Dataset
+from models.course import Course
+
+class BranchAndBound:
+    """
+    Looks for the timetable accepted by `ARCAlgorithm` with the lowest cost of soft constraints
+    (see `SoftConstraints`). Each timetable found sets the cost to beat, and the branches whose
+    bound (the `LowestCost` value ordering, updated with every domain change) reaches it are cut.
+
+    The symmetries are restricted to the classrooms and groups the soft constraints do not tell
+    apart, the timetables they skip cost as much as the one explored. The search stops at the
+    time limit, with the best timetable found so far, or once it proved that no cheaper one exists.
+    """
+    algo: ARCAlgorithm
+    time_limit: float  # In seconds
+    best_cost: Optional[int]
+    best_solution: Optional[list]
+    optimal: bool  # The best solution is proved optimal, or without one, that there is no timetable
+
+    # Nodes visited between two checks of the time limit
+    NODES_PER_CHECK = 100
+
+    def __init__(self, courses: list[Course], dataset: Dataset, propagator: str = "ac3",
+                 variable_ordering: str = "mrv", symmetry_breaking: bool = False, time_limit: float = 60.0):
+        self.algo = ARCAlgorithm(courses, dataset, propagator=propagator, variable_ordering=variable_ordering,
+                                 value_ordering="cost", symmetry_breaking=symmetry_breaking,
+                                 soft_constraints=SoftConstraints(courses, dataset))
+        self.time_limit = time_limit
+        self.best_cost = None
+        self.best_solution = None
+        self.optimal = False
+
+    def frame(self, assignment: dict[Course, int], domains: dict[Course, DomainType]) -> Frame:
+        """
+        Assigns the values of the next course from the cheapest, as long as they can beat the best cost.
+        """
+        algo = self.algo
+        costs = algo.value_order
+        course = algo.select_unassigned_variable(assignment, domains)
+        used = algo.used_classrooms(assignment) if algo.symmetries is not None else {}
+        for value in costs.order(course, domains[course]):
+            if self.best_cost is not None and costs.bound - costs.lowest[course] + costs.costs[course][value] >= self.best_cost:
+                # The values come from the cheapest, the next ones cannot do better
+                return
+            if algo.symmetries is not None:
+                classroom, _, time_interval = algo.values[value]
+                if not algo.symmetries.classroom_weight(classroom, used.get(time_interval, ())):
+                    continue
+            if not algo.is_consistent(course, value, assignment):
+                continue
+
+            mark = len(algo.trail)
+            algo.ordering.assigning(course)
+            costs.assigning(course, domains[course])
+            assignment[course] = value
+            algo.set_domain(domains, course, bit(value))
+            changed = algo.order_chain(domains, course, value, assignment) if algo.symmetries is not None else [course]
+            consistent = changed is not None and algo.propagate(domains, assignment, changed)
+            if consistent and self.best_cost is not None:
+                consistent = self.filter_costs(domains, assignment)
+            algo.ordering.propagated(course, consistent)
+            if consistent:
+                yield 1
+            algo.undo(domains, mark)
+            del assignment[course]
+            algo.ordering.unassigned(course, domains[course])
+            costs.unassigned(course, domains[course])
+
+    def filter_costs(self, domains: dict[Course, DomainType], assignment: dict[Course, int]) -> bool:
+        """
+        Removes from the domains the values which alone would bring the bound to the best cost,
+        and propagates the removals, until there are none left. Returns False if the bound
+        reached the best cost or a domain was emptied.
+        """
+        algo = self.algo
+        costs = algo.value_order
+        while costs.bound < self.best_cost:
+            changed = []
+            for course, ranked_costs in costs.ranked_costs.items():
+                if course in assignment:
+                    continue
+                # The values costing at least this much over the lowest one of the course cannot beat the best cost
+                limit = self.best_cost - costs.bound + costs.lowest[course]
+                removed = domains[course] & costs.suffixes[course][bisect_left(ranked_costs, limit)]
+                if removed:
+                    algo.set_domain(domains, course, domains[course] & ~removed)
+                    if not domains[course]:
+                        return False
+                    changed.append(course)
+            if not changed:
+                return True
+            if not algo.propagate(domains, assignment, changed):
+                return False
+        return False
+
+    def solve(self) -> bool:
+        """
+        Searches until the time limit, printing the cost of every better timetable found.
+        Returns whether a timetable was found. When none was, `optimal` tells whether there
+        is none or the time limit was reached first.
+        """
+        time_start = perf_counter()
+        algo = self.algo
+        domains = algo.preprocess()
+        if domains is None:
+            self.optimal = True
+            return False
+        algo.start_search(domains)
+        assignment = {}
+        engine = SearchEngine(lambda: self.frame(assignment, domains), len(algo.courses))
+        while perf_counter() - time_start < self.time_limit:
+            found = engine.solve(self.NODES_PER_CHECK)
+            if found is None:
+                continue
+            if not found:
+                self.optimal = True
+                break
+            self.best_cost = algo.value_order.bound
+            self.best_solution = [(course, algo.values[assignment[course]]) for course in algo.courses]
+            print(f"Cost {self.best_cost} after {perf_counter() - time_start:.2f}s")
+            if self.best_cost == 0:
+                self.optimal = True
+                break
+        return self.best_solution is not None
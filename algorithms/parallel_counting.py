@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from algorithms.bkt import BKTAlgorithm
+from io_utils.dataset import Dataset
+from models.course import Course
+from models.time_interval import TimeInterval
+
+# A prefix of the search tree: the assignments of the first courses, as (classroom id,
+# staff member ids, time interval value), and the symmetry weight of the whole prefix.
+Prefix = tuple[list[tuple[str, list[str], int]], int]
+
+# Prefixes are split until there are this many per worker, so a worker which got small
+# subtrees can take more of them while another one is busy with a large one.
+TASKS_PER_WORKER = 32
+
+_worker_algorithm: Optional[BKTAlgorithm] = None
+
+def _start_worker(courses: list[Course], dataset: Dataset, symmetry_breaking: bool):
+    global _worker_algorithm
+    _worker_algorithm = BKTAlgorithm(courses, dataset, symmetry_breaking=symmetry_breaking)
+
+def _count_prefix(prefix: Prefix) -> int:
+    algo = _worker_algorithm
+    assignments, weight = prefix
+    for course, (classroom_id, staff_member_ids, time_interval) in zip(algo.courses, assignments):
+        algo.assign(course, algo.dataset.get_classroom(classroom_id), staff_member_ids, TimeInterval(time_interval))
+    count = algo.backtrack_counting()
+    for _ in assignments:
+        algo.unassign()
+    return weight * count
+
+def split(algo: BKTAlgorithm, tasks: int) -> list[Prefix]:
+    """
+    Expands the search tree of `algo` level by level until it has at least `tasks` prefixes
+    (or all the courses are assigned). The weights of the prefixes include the symmetries.
+    """
+    prefixes: list[Prefix] = [([], 1)]
+    depth = 0
+    while len(prefixes) < tasks and depth < len(algo.courses):
+        course = algo.courses[depth]
+        expanded = []
+        for assignments, weight in prefixes:
+            for assigned, (classroom_id, staff_member_ids, time_interval) in zip(algo.courses, assignments):
+                algo.assign(assigned, algo.dataset.get_classroom(classroom_id), staff_member_ids, TimeInterval(time_interval))
+            for classroom, staff_member_ids, time_interval, candidate_weight in algo.candidates(course):
+                expanded.append((assignments + [(classroom.get_id(), staff_member_ids, time_interval.value)], weight * candidate_weight))
+            for _ in assignments:
+                algo.unassign()
+        prefixes = expanded
+        depth += 1
+    return prefixes
+
+def count_in_parallel(courses: list[Course], dataset: Dataset, workers: int, symmetry_breaking: bool = False) -> int:
+    """
+    Same result as `BKTAlgorithm.backtrack_counting`, with the top of the search tree split
+    into independent prefixes counted by a pool of `workers` processes. The prefixes are
+    handed out one at a time as the workers finish their previous one.
+    """
+    algo = BKTAlgorithm(courses, dataset, symmetry_breaking=symmetry_breaking)
+    prefixes = split(algo, workers * TASKS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker,
+                             initargs=(courses, dataset, symmetry_breaking)) as executor:
+        return sum(executor.map(_count_prefix, prefixes, chunksize=1))
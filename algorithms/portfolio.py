@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import queue
+import sys
+from typing import Optional
+
+from algorithms.arc import ARCAlgorithm
+from io_utils.dataset import Dataset
+from models.course import Course
+from models.time_interval import TimeInterval
+
+# A solution sent back by a worker: (course index, classroom id, staff member ids, time interval value)
+# for every course, as the objects of the worker are copies of the ones of the parent.
+EncodedSolution = list[tuple[int, str, list[str], int]]
+
+class Configuration:
+    """
+    One solver of the portfolio: the options of `ARCAlgorithm` and the seed shuffling the
+    order in which the ties are broken. `BKTAlgorithm` is not part of it, it does not enforce
+    the hard unavailabilities.
+    """
+    seed: Optional[int]
+    options: dict[str, str]
+
+    def __init__(self, seed: Optional[int] = None, **options: str):
+        self.seed = seed
+        self.options = options
+
+    def __str__(self) -> str:
+        description = " ".join(["arc"] + [f"{name}={option}" for name, option in self.options.items()])
+        return description if self.seed is None else f"{description} seed={self.seed}"
+
+    def create(self, courses: list[Course], dataset: Dataset, symmetry_breaking: bool) -> ARCAlgorithm:
+        return ARCAlgorithm(courses, dataset, symmetry_breaking=symmetry_breaking, seed=self.seed, **self.options)
+
+# The configurations run by `run_portfolio`, the first ones are used when there are fewer workers.
+# They differ in the order they explore the search tree, so one of them is lucky on most inputs.
+PORTFOLIO = [
+    Configuration(propagator="ac2001", variable_ordering="mrv", value_ordering="static"),
+    Configuration(propagator="ac2001", variable_ordering="dom-wdeg", value_ordering="lcv"),
+    Configuration(propagator="ac3", variable_ordering="impact", value_ordering="static"),
+    Configuration(propagator="ac2001", variable_ordering="mrv-degree", value_ordering="lcv", seed=1),
+    Configuration(propagator="ac2001", variable_ordering="dom-wdeg", value_ordering="static", seed=2),
+    Configuration(propagator="ac2001", variable_ordering="mrv", value_ordering="lcv", seed=3),
+]
+
+def _run_configuration(index: int, configuration: Configuration, courses: list[Course], dataset: Dataset,
+                       symmetry_breaking: bool, results: multiprocessing.Queue):
+    # The solvers print their progress, only the parent reports
+    sys.stdout = open(os.devnull, "w")
+    algo = configuration.create(courses, dataset, symmetry_breaking)
+    found = algo.solve()
+    course_indexes = {course: course_index for course_index, course in enumerate(courses)}
+    solution: Optional[EncodedSolution] = None
+    if found:
+        # In the order of `courses`, whatever order the configuration assigned them in
+        solution = sorted((course_indexes[course], classroom.get_id(), list(staff_member_ids), time_interval.value)
+                          for course, (classroom, staff_member_ids, time_interval) in algo.solution)
+    results.put((index, solution))
+
+def run_portfolio(courses: list[Course], dataset: Dataset, workers: Optional[int] = None,
+                  symmetry_breaking: bool = False) -> Optional[tuple[Configuration, list]]:
+    """
+    Runs the first `workers` configurations of `PORTFOLIO` (all of them by default) in their own
+    processes. The first solution found wins and the other processes are terminated.
+    Returns the winning configuration with its solution, or None when every configuration
+    finished without a solution. A solution breaking a hard constraint is reported and
+    discarded, the other configurations go on.
+    """
+    configurations = PORTFOLIO[:workers] if workers else PORTFOLIO
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_run_configuration, daemon=True,
+                                         args=(index, configuration, courses, dataset, symmetry_breaking, results))
+                 for index, configuration in enumerate(configurations)]
+    for process in processes:
+        process.start()
+
+    checker = ARCAlgorithm(courses, dataset, symmetry_breaking=False)
+    winner = None
+    pending = len(processes)
+    try:
+        while pending and winner is None:
+            try:
+                index, solution = results.get(timeout=0.1)
+            except queue.Empty:
+                # A worker which died without answering (killed, out of memory) will never answer
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    break
+                continue
+            pending -= 1
+            if solution is None:
+                continue
+            decoded = [(courses[course_index], (dataset.get_classroom(classroom_id), staff_member_ids, TimeInterval(time_interval)))
+                       for course_index, classroom_id, staff_member_ids, time_interval in solution]
+            if checker.is_valid_solution(decoded):
+                winner = (configurations[index], decoded)
+            else:
+                print(f"The solution of {configurations[index]} breaks a hard constraint, it is discarded.")
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+        results.close()
+    return winner
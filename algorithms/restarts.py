@@ -0,0 +1,60 @@
+from abc import ABC, abstractmethod
+
+class Restart(Exception):
+    """
+    Raised by a search once it failed as many assignments as the cutoff of its current run.
+    """
+
+def luby(index: int) -> int:
+    """
+    Returns the `index`-th term (from 1) of the Luby sequence: 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ...
+    """
+    while True:
+        # The sequence is built of blocks of length 2^k - 1, each ending with 2^(k - 1)
+        k = 1
+        while (1 << k) - 1 < index:
+            k += 1
+        if index == (1 << k) - 1:
+            return 1 << (k - 1)
+        # Inside a block the sequence starts over after its first half
+        index -= (1 << (k - 1)) - 1
+
+class RestartSchedule(ABC):
+    """
+    Gives the number of failed assignments after which each run of a search is restarted.
+    Runs are numbered from 0.
+    """
+    base: int
+
+    def __init__(self, base: int = 100):
+        self.base = base
+
+    @abstractmethod
+    def cutoff(self, run: int) -> int:
+        pass
+
+class LubySchedule(RestartSchedule):
+    """
+    `base` times the Luby sequence. Within a constant factor of the best fixed cutoff,
+    without knowing anything about the distribution of the run times.
+    """
+    def cutoff(self, run: int) -> int:
+        return self.base * luby(run + 1)
+
+class GeometricSchedule(RestartSchedule):
+    """
+    `base` growing by `factor` at every run.
+    """
+    factor: float
+
+    def __init__(self, base: int = 100, factor: float = 1.5):
+        super().__init__(base)
+        self.factor = factor
+
+    def cutoff(self, run: int) -> int:
+        return int(self.base * self.factor ** run)
+
+RESTART_SCHEDULES = {
+    "luby": LubySchedule,
+    "geometric": GeometricSchedule,
+}
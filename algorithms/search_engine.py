@@ -0,0 +1,113 @@
+from typing import Callable, Iterator, Optional
+
+# The frame of a node of the search tree: a generator which assigns the next child of the node
+# each time it is resumed, after undoing the previous one, and yields the weight of the child
+# (the number of symmetric children it stands for, 1 without symmetries). Returning ends the
+# node, either because every child was tried or because the remaining ones cannot help.
+Frame = Iterator[int]
+
+class SearchEngine:
+    """
+    Depth first search over an explicit stack of frames, instead of one recursive call per
+    course: the depth of the tree is not bound by the recursion limit, and the state of the
+    search is kept between calls, so a search stopped by a node limit can be resumed.
+
+    `expand` returns the frame of the current node, every frame assigning one course, so the
+    assignment is complete once `depth` frames (the number of courses left) assigned a child.
+    `solution_weight` is the number of solutions a complete assignment stands for when counting,
+    and `count_last`, if given, returns the weighted number of values of the last course left
+    without assigning them, so the leaves are counted without a frame.
+    An engine is used either to find solutions or to count them.
+    """
+    expand: Callable[[], Frame]
+    depth: int
+    solution_weight: int
+    count_last: Optional[Callable[[], int]]
+    stack: list[Frame]
+    totals: list[int]  # Weighted number of solutions found below each frame of the stack, when counting
+    weights: list[int]  # Weight of the child each frame of the stack is exploring, when counting
+    nodes: int  # Number of children assigned so far
+    started: bool
+
+    def __init__(self, expand: Callable[[], Frame], depth: int, solution_weight: int = 1,
+                 count_last: Optional[Callable[[], int]] = None):
+        self.expand = expand
+        self.depth = depth
+        self.solution_weight = solution_weight
+        self.count_last = count_last
+        self.stack = []
+        self.totals = []
+        self.weights = []
+        self.nodes = 0
+        self.started = False
+
+    def solve(self, node_limit: Optional[int] = None) -> Optional[bool]:
+        """
+        Searches until every course is assigned (True), the tree is exhausted (False) or
+        `node_limit` more nodes were visited (None). Calling it again resumes the search,
+        after a solution it looks for the next one.
+        """
+        stack, depth = self.stack, self.depth
+        if not self.started:
+            self.started = True
+            if not depth:
+                return True
+            stack.append(self.expand())
+        limit = None if node_limit is None else self.nodes + node_limit
+        while stack:
+            if self.nodes == limit:
+                return None
+            if next(stack[-1], None) is None:
+                stack.pop()
+                continue
+            self.nodes += 1
+            if len(stack) == depth:
+                return True
+            stack.append(self.expand())
+        return False
+
+    def count(self, node_limit: Optional[int] = None) -> Optional[int]:
+        """
+        Counts the solutions, each one weighted by the weights of its ancestors, or returns
+        None once `node_limit` more nodes were visited. Calling it again resumes the count.
+        """
+        stack, totals, weights, depth = self.stack, self.totals, self.weights, self.depth
+        # Frames are opened down to this depth, the last course is counted by `count_last`
+        frames = depth - 1 if self.count_last is not None else depth
+        if not self.started:
+            self.started = True
+            if not depth:
+                totals.append(self.solution_weight)
+                return totals[0]
+            if not frames:
+                totals.append(self.count_last() * self.solution_weight)
+                return totals[0]
+            stack.append(self.expand())
+            totals.append(0)
+            weights.append(0)
+        elif not stack:
+            return totals[0]
+        limit = None if node_limit is None else self.nodes + node_limit
+        while True:
+            if self.nodes == limit:
+                return None
+            weight = next(stack[-1], None)
+            if weight is None:
+                stack.pop()
+                weights.pop()
+                if not stack:
+                    return totals[0]
+                total = totals.pop()
+                totals[-1] += weights[-1] * total
+                continue
+            self.nodes += 1
+            if len(stack) == frames:
+                if frames == depth:
+                    totals[-1] += weight * self.solution_weight
+                else:
+                    totals[-1] += weight * self.count_last() * self.solution_weight
+            else:
+                weights[-1] = weight
+                stack.append(self.expand())
+                totals.append(0)
+                weights.append(0)
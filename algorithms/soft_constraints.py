@@ -0,0 +1,98 @@
+from io_utils.dataset import Dataset
+from models.classroom import Classroom
+from models.constraints.constants import Weight
+from models.constraints.preffered_event import PreferredEvent
+from models.constraints.unavailable_classroom_time import UnavailableClassroomTime
+from models.constraints.unavailable_staff_time import UnavailableStaffTime
+from models.course import Course
+from models.time_interval import TimeInterval
+
+# Cost of breaking a constraint of each weight. The hard unavailabilities are enforced by the
+# solvers, a hard preferred event is only a preference which weighs more than the others.
+WEIGHT_COSTS = {
+    Weight.SOFT: 1,
+    Weight.SOFTHARD: 10,
+    Weight.HARD: 100,
+}
+
+class SoftConstraints:
+    """
+    The constraints the solvers do not enforce: unavailabilities which are not hard and every
+    preferred event. Each of them depends on the assignment of a single course, so the cost
+    of a timetable is the sum of the costs of its assignments (`cost`).
+
+    A preferred event applies to the courses of its event and type attended by its group
+    (the lecture of A for A2), each of its time intervals, classroom and instructor not
+    respected costs its weight.
+    """
+    dataset: Dataset
+    staff_unavailability: dict[tuple[str, TimeInterval], int]  # (staff member id, time interval) -> cost
+    classroom_unavailability: dict[tuple[str, TimeInterval], int]  # (classroom id, time interval) -> cost
+    preferences: dict[Course, list[PreferredEvent]]
+
+    def __init__(self, courses: list[Course], dataset: Dataset):
+        self.dataset = dataset
+        self.staff_unavailability = {}
+        self.classroom_unavailability = {}
+        preferred_events = []
+        for constraint in dataset.constraints:
+            if isinstance(constraint, PreferredEvent):
+                preferred_events.append(constraint)
+                continue
+            if constraint.get_weight() == Weight.HARD.value:
+                continue
+            cost = WEIGHT_COSTS[Weight(constraint.get_weight())]
+            if isinstance(constraint, UnavailableStaffTime):
+                staff_member = dataset.get_staff_member_by_name(constraint.get_name())
+                if staff_member is None:
+                    continue
+                for time_interval in constraint.get_time_intervals():
+                    key = (staff_member.get_id(), time_interval)
+                    self.staff_unavailability[key] = self.staff_unavailability.get(key, 0) + cost
+            if isinstance(constraint, UnavailableClassroomTime):
+                for time_interval in constraint.get_time_intervals():
+                    key = (constraint.get_classroom_id(), time_interval)
+                    self.classroom_unavailability[key] = self.classroom_unavailability.get(key, 0) + cost
+
+        self.preferences = {}
+        for course in courses:
+            name = dataset.get_event(course.get_event_id()).get_name()
+            matching = [preferred_event for preferred_event in preferred_events
+                        if preferred_event.get_course_name() == name
+                        and preferred_event.get_course_type() == course.get_type()
+                        and course.get_group() in (preferred_event.get_group(), preferred_event.get_group()[:1], "ABE")]
+            if matching:
+                self.preferences[course] = matching
+
+    def classroom_costs(self, classroom_id: str) -> tuple[tuple[int, int], ...]:
+        """
+        The (time interval, cost) pairs of the soft unavailabilities of a classroom.
+        """
+        return tuple(sorted((time_interval.value, cost) for (other_id, time_interval), cost in self.classroom_unavailability.items()
+                            if other_id == classroom_id))
+
+    def preferred_classrooms(self) -> set[str]:
+        """
+        The ids of the classrooms named by the preferred events of the courses.
+        """
+        return {preferred_event.get_classroom_id() for preferred_events in self.preferences.values()
+                for preferred_event in preferred_events}
+
+    def cost(self, course: Course, assignment: tuple[Classroom, list[str], TimeInterval]) -> int:
+        classroom, staff_member_ids, time_interval = assignment
+        cost = self.classroom_unavailability.get((classroom.get_id(), time_interval), 0)
+        for staff_member_id in staff_member_ids:
+            cost += self.staff_unavailability.get((staff_member_id, time_interval), 0)
+        for preferred_event in self.preferences.get(course, ()):
+            weight = WEIGHT_COSTS[Weight(preferred_event.get_weight())]
+            if preferred_event.get_time_intervals() and time_interval not in preferred_event.get_time_intervals():
+                cost += weight
+            if classroom.get_id() != preferred_event.get_classroom_id():
+                cost += weight
+            instructor = self.dataset.get_staff_member_by_name(preferred_event.get_instructor_name())
+            if instructor is None or instructor.get_id() not in staff_member_ids:
+                cost += weight
+        return cost
+
+    def solution_cost(self, solution: list) -> int:
+        return sum(self.cost(course, assignment) for course, assignment in solution)
@@ -0,0 +1,104 @@
+from math import factorial
+from typing import Callable, Iterable, Optional
+
+from algorithms.soft_constraints import SoftConstraints
+from models.classroom import Classroom
+from models.course import Course
+from models.time_interval import TimeInterval
+
+OrderKey = tuple[int, tuple[str, ...]]  # (time interval, staff member ids) of an assignment
+
+def order_key(time_interval: TimeInterval, staff_member_ids: Iterable[str]) -> OrderKey:
+    return (time_interval.value, tuple(staff_member_ids))
+
+class Symmetries:
+    """
+    Interchangeable classrooms and groups, detected from the input, and the rules
+    used by the searches to explore a single timetable out of each set of symmetric ones.
+
+    Classrooms of the same type with the same availability are interchangeable in every
+    time interval independently: a course only takes the first classroom of its class
+    not used yet in its time interval, and when counting that assignment stands for one
+    per classroom of the class still free (`classroom_weight`).
+
+    Groups like A1..A5 are interchangeable when each of them has the same courses (events,
+    types, instructors). Renaming them permutes the assignments of their courses, so the
+    courses of one event (the chain) are required to take increasing (time interval, staff)
+    pairs (`is_ordered`). Two courses of a chain never share both, so exactly one of the
+    renamings of a timetable satisfies this, and every counted timetable stands for
+    `multiplier` of them.
+
+    With `soft_constraints`, only the classrooms and groups they do not tell apart are
+    interchangeable (a classroom named by a preferred event is not interchangeable with
+    any other), so the symmetric timetables also have the same cost.
+    """
+    classroom_classes: dict[str, list[str]]  # Classroom id -> ids of the classrooms of its class, in input order
+    group_classes: list[list[str]]
+    previous: dict[Course, Course]  # Previous course of the chain, for the courses in a chain
+    next: dict[Course, Course]
+    multiplier: int
+
+    def __init__(self, courses: list[Course], classrooms: list[Classroom], soft_constraints: Optional[SoftConstraints] = None):
+        classes: dict[tuple, list[str]] = {}
+        preferred_classrooms = set() if soft_constraints is None else soft_constraints.preferred_classrooms()
+        for classroom in classrooms:
+            key = (classroom.get_type(), classroom.availability.tobytes())
+            if soft_constraints is not None:
+                key += soft_constraints.classroom_costs(classroom.get_id())
+            if classroom.get_id() in preferred_classrooms:
+                # A classroom a preference names costs less than the others, it is alone in its class
+                key += (classroom.get_id(),)
+            classes.setdefault(key, []).append(classroom.get_id())
+        self.classroom_classes = {classroom_id: members for members in classes.values() for classroom_id in members}
+
+        signatures: dict[str, list[tuple]] = {}
+        for course in courses:
+            signatures.setdefault(course.get_group(), []).append(
+                (course.get_event_id(), course.get_type().value, tuple(course.get_instructors()), course.get_optional_package()))
+        preferred = set() if soft_constraints is None else {course.get_group() for course in soft_constraints.preferences}
+        groups: dict[tuple, list[str]] = {}
+        for group, signature in signatures.items():
+            # Only the groups of a half year (A1, B2, ...) can be renamed, A and ABE conflict with all of them
+            if len(group) == 2 and group not in preferred:
+                groups.setdefault((group[0], tuple(sorted(signature, key=str))), []).append(group)
+        self.group_classes = [sorted(members) for members in groups.values() if len(members) > 1]
+
+        self.previous = {}
+        self.next = {}
+        self.multiplier = 1
+        for members in self.group_classes:
+            anchor = next(course for course in courses if course.get_group() in members)
+            chain = [next(course for course in courses
+                          if course.get_group() == group and course.get_event_id() == anchor.get_event_id()
+                          and course.get_type() == anchor.get_type())
+                     for group in members]
+            for course, following in zip(chain, chain[1:]):
+                self.next[course] = following
+                self.previous[following] = course
+            self.multiplier *= factorial(len(members))
+
+    def classroom_weight(self, classroom: Classroom, used: Iterable[str]) -> int:
+        """
+        Returns 0 if `classroom` is not the first classroom of its class missing from `used`
+        (the classrooms taken in a time interval), else the number of classrooms of its class
+        missing from `used`.
+        """
+        free = [classroom_id for classroom_id in self.classroom_classes[classroom.get_id()] if classroom_id not in used]
+        return len(free) if free and free[0] == classroom.get_id() else 0
+
+    def is_ordered(self, course: Course, key: OrderKey, key_of: Callable[[Course], Optional[OrderKey]]) -> bool:
+        """
+        Checks the chain order of `course` taking an assignment with `key` against its assigned
+        neighbors in the chain. `key_of` returns the key of a course or None if it is not assigned.
+        """
+        previous = self.previous.get(course)
+        if previous is not None:
+            previous_key = key_of(previous)
+            if previous_key is not None and previous_key >= key:
+                return False
+        following = self.next.get(course)
+        if following is not None:
+            following_key = key_of(following)
+            if following_key is not None and following_key <= key:
+                return False
+        return True
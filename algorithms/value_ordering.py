@@ -0,0 +1,198 @@
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+from algorithms.bitset import bit, iter_bits
+from algorithms.soft_constraints import SoftConstraints
+from models.course import Course
+from models import slots
+
+class ValueOrdering(ABC):
+    """
+    Chooses in which order `ARCAlgorithm.backtrack` tries the values of a course.
+    The search reports every domain change to it, like to the variable ordering.
+    """
+    def __init__(self, algo):
+        self.algo = algo
+
+    def start(self, domains: dict[Course, int]):
+        pass
+
+    @abstractmethod
+    def order(self, course: Course, domain: int) -> Iterable[int]:
+        pass
+
+    def domain_changed(self, course: Course, old_domain: int, new_domain: int):
+        pass
+
+    def assigning(self, course: Course, domain: int):
+        """
+        Called before a value is assigned to `course`, whose domain is still `domain`.
+        """
+        pass
+
+    def unassigned(self, course: Course, domain: int):
+        """
+        Called once the value of `course` was taken back and its domain restored to `domain`.
+        """
+        pass
+
+class StaticOrder(ValueOrdering):
+    """
+    The values in the order they were built: by classroom, then by time interval.
+    """
+    def order(self, course: Course, domain: int) -> Iterable[int]:
+        return iter_bits(domain)
+
+class LeastConstrainingValue(ValueOrdering):
+    """
+    Least constraining value first. A value is scored by the number of values of the other
+    unassigned courses it would rule out: the values using its classroom or one of its staff
+    members in its time interval, plus the values in its time interval of the courses whose
+    groups conflict with the course. Only neighbors (see `ARCAlgorithm.build_constraint_graph`)
+    can have such values. A value is counted once per resource it shares with the value scored.
+
+    Those counts are kept up to date from the domain changes of the unassigned courses, per
+    (time interval, classroom), per (time interval, staff member) and per (course, time
+    interval), so scoring a value does not look at the other domains. The domain of the course
+    being ordered is left out of them while its values are scored.
+    """
+    value_slots: list[int]
+    value_classrooms: list[int]
+    value_staff: list[tuple[int, ...]]
+    classroom_usage: list[int]  # Indexed by slot * classrooms + classroom
+    staff_usage: list[int]  # Indexed by slot * staff members + staff member
+    slot_usage: dict[Course, list[int]]  # Number of values of the course in each time interval
+    group_neighbors: dict[Course, list[Course]]
+    assigned: set[Course]  # Left out of the counts
+
+    def __init__(self, algo):
+        super().__init__(algo)
+        self.classrooms = len(algo.lecture_classes) + len(algo.laboratory_classes)
+        self.staff_members = len(algo.staff_members)
+        self.value_slots = algo.value_slot_ids
+        self.value_classrooms = [slot * self.classrooms + classroom
+                                 for slot, classroom in zip(self.value_slots, algo.value_classrooms)]
+        self.value_staff = [tuple(slot * self.staff_members + staff_member for staff_member in iter_bits(staff))
+                            for slot, staff in zip(self.value_slots, algo.value_staff)]
+        self.classroom_usage = [0] * (slots.SLOT_COUNT * self.classrooms)
+        self.staff_usage = [0] * (slots.SLOT_COUNT * self.staff_members)
+        self.slot_usage = {course: [0] * slots.SLOT_COUNT for course in algo.courses}
+        self.group_neighbors = {
+            course: [neighbor for neighbor in algo.neighbors[course]
+                     if algo.group_conflicts[algo.course_ids[course]][algo.course_ids[neighbor]]]
+            for course in algo.courses
+        }
+        self.assigned = set()
+
+    def start(self, domains: dict[Course, int]):
+        for course, domain in domains.items():
+            self.count(course, domain, 1)
+
+    def count(self, course: Course, values: int, step: int):
+        slot_usage = self.slot_usage[course]
+        for value in iter_bits(values):
+            self.classroom_usage[self.value_classrooms[value]] += step
+            for key in self.value_staff[value]:
+                self.staff_usage[key] += step
+            slot_usage[self.value_slots[value]] += step
+
+    def domain_changed(self, course: Course, old_domain: int, new_domain: int):
+        if course in self.assigned:
+            return
+        changed = old_domain ^ new_domain
+        if changed & old_domain:
+            self.count(course, changed & old_domain, -1)
+        if changed & new_domain:
+            self.count(course, changed & new_domain, 1)
+
+    def assigning(self, course: Course, domain: int):
+        self.count(course, domain, -1)
+        self.assigned.add(course)
+
+    def unassigned(self, course: Course, domain: int):
+        self.assigned.discard(course)
+        self.count(course, domain, 1)
+
+    def score(self, course: Course, value: int) -> int:
+        slot = self.value_slots[value]
+        score = self.classroom_usage[self.value_classrooms[value]]
+        for key in self.value_staff[value]:
+            score += self.staff_usage[key]
+        for neighbor in self.group_neighbors[course]:
+            if neighbor not in self.assigned:
+                score += self.slot_usage[neighbor][slot]
+        return score
+
+    def order(self, course: Course, domain: int) -> Iterable[int]:
+        # The values of the course do not rule each other out
+        self.count(course, domain, -1)
+        scores = {value: self.score(course, value) for value in iter_bits(domain)}
+        self.count(course, domain, 1)
+        ranks = self.algo.value_ranks
+        if ranks is not None:
+            return sorted(scores, key=lambda value: (scores[value], ranks[value]))
+        # sorted is stable, equal scores keep the static order
+        return sorted(scores, key=scores.__getitem__)
+
+class LowestCost(ValueOrdering):
+    """
+    The values breaking the fewest soft constraints first (see `SoftConstraints`).
+
+    It also keeps `bound`, the sum over the courses of the lowest cost left in their domain.
+    The domains of the assigned courses hold only their value, so this is the cost of the
+    assignment plus a lower bound of the cost of the courses left, used by `BranchAndBound`.
+    """
+    soft_constraints: SoftConstraints
+    costs: dict[Course, dict[int, int]]  # Cost of each value of the domain of the course when the search started
+    ranked: dict[Course, list[int]]  # The values of `costs` from the cheapest, only for the courses with a cost
+    ranked_costs: dict[Course, list[int]]  # The costs of `ranked`
+    suffixes: dict[Course, list[int]]  # Bitset of the values of `ranked` from each position on
+    lowest: dict[Course, int]
+    bound: int
+
+    def __init__(self, algo):
+        super().__init__(algo)
+        self.soft_constraints = algo.soft_constraints or SoftConstraints(algo.courses, algo.dataset)
+        self.costs = {}
+        self.ranked = {}
+        self.ranked_costs = {}
+        self.suffixes = {}
+        self.lowest = {}
+        self.bound = 0
+
+    def start(self, domains: dict[Course, int]):
+        for course, domain in domains.items():
+            costs = {value: self.soft_constraints.cost(course, self.algo.values[value]) for value in iter_bits(domain)}
+            self.costs[course] = costs
+            if any(costs.values()):
+                ranked = self.ranked[course] = sorted(costs, key=costs.__getitem__)
+                self.ranked_costs[course] = [costs[value] for value in ranked]
+                suffixes = [0] * (len(ranked) + 1)
+                for index in range(len(ranked) - 1, -1, -1):
+                    suffixes[index] = suffixes[index + 1] | bit(ranked[index])
+                self.suffixes[course] = suffixes
+            self.lowest[course] = self.lowest_cost(course, domain)
+        self.bound = sum(self.lowest.values())
+
+    def lowest_cost(self, course: Course, domain: int) -> int:
+        for value in self.ranked.get(course, ()):
+            if (domain >> value) & 1:
+                return self.costs[course][value]
+        return 0
+
+    def domain_changed(self, course: Course, old_domain: int, new_domain: int):
+        if course not in self.ranked:
+            return
+        lowest = self.lowest_cost(course, new_domain)
+        self.bound += lowest - self.lowest[course]
+        self.lowest[course] = lowest
+
+    def order(self, course: Course, domain: int) -> Iterable[int]:
+        # sorted is stable, equal costs keep the static order
+        return sorted(iter_bits(domain), key=self.costs[course].__getitem__)
+
+VALUE_ORDERINGS = {
+    "static": StaticOrder,
+    "lcv": LeastConstrainingValue,
+    "cost": LowestCost,
+}
@@ -0,0 +1,187 @@
+import heapq
+from abc import ABC, abstractmethod
+from math import exp, log
+
+from models.course import Course
+
+class VariableOrdering(ABC):
+    """
+    Chooses the next course to assign in `ARCAlgorithm.backtrack`.
+
+    The unassigned courses are kept in a heap keyed by `score` (lowest first). The search
+    reports every domain change, assignment and domain wipeout to the ordering, which pushes
+    a new entry for the course. Entries made stale by a later change are skipped when they
+    reach the top of the heap, so selecting a course is not a scan over all the courses.
+    """
+    heap: list[tuple]
+    versions: dict[Course, int]
+    order: dict[Course, int]  # Position of the course in the input, breaks ties
+    started: bool
+
+    # Stale entries are dropped by rebuilding the heap once it is this many times larger than the number of courses
+    REBUILD_FACTOR = 8
+
+    def __init__(self, courses: list[Course], neighbors: dict[Course, list[Course]]):
+        self.courses = courses
+        self.neighbors = neighbors
+        self.order = {course: index for index, course in enumerate(courses)}
+        self.versions = {course: 0 for course in courses}
+        self.heap = []
+        self.started = False
+
+    @abstractmethod
+    def score(self, course: Course, domain: int):
+        pass
+
+    def start(self, domains: dict[Course, int]):
+        self.started = True
+        self.rebuild(domains, {})
+
+    def rebuild(self, domains: dict[Course, int], assignment: dict[Course, int]):
+        self.heap = []
+        for course in self.courses:
+            self.versions[course] += 1
+            if course not in assignment:
+                self.heap.append((self.score(course, domains[course]), self.order[course], self.versions[course], course))
+        heapq.heapify(self.heap)
+
+    def push(self, course: Course, domain: int):
+        if not self.started:
+            return
+        version = self.versions[course] = self.versions[course] + 1
+        heapq.heappush(self.heap, (self.score(course, domain), self.order[course], version, course))
+
+    def select(self, assignment: dict[Course, int], domains: dict[Course, int]) -> Course:
+        if not self.started:
+            self.start(domains)
+        if len(self.heap) > self.REBUILD_FACTOR * len(self.courses):
+            self.rebuild(domains, assignment)
+
+        heap = self.heap
+        while heap:
+            _, _, version, course = heap[0]
+            if version == self.versions[course] and course not in assignment:
+                return course
+            heapq.heappop(heap)
+        return None
+
+    def domain_changed(self, course: Course, old_domain: int, new_domain: int):
+        self.push(course, new_domain)
+
+    def carry_over(self, previous: "VariableOrdering"):
+        """
+        Called before `start` when the search restarts, with the ordering of the previous run,
+        to keep what it learned.
+        """
+        pass
+
+    def unassigned(self, course: Course, domain: int):
+        self.push(course, domain)
+
+    def wiped_out(self, course_i: Course, course_j: Course, domains: dict[Course, int]):
+        """
+        Called when revising the arc (course_i, course_j) emptied the domain of course_i.
+        """
+        pass
+
+    def assigning(self, course: Course):
+        """
+        Called before a value is assigned to `course` and propagated.
+        """
+        pass
+
+    def propagated(self, course: Course, success: bool):
+        """
+        Called after the assignment of `course` was propagated.
+        """
+        pass
+
+class MinimumRemainingValues(VariableOrdering):
+    """
+    The course with the smallest domain first (MRV).
+    """
+    def score(self, course: Course, domain: int):
+        return domain.bit_count()
+
+class MinimumRemainingValuesDegree(VariableOrdering):
+    """
+    MRV, with ties broken by the number of neighbors in the constraint graph (most constrained first).
+    """
+    def score(self, course: Course, domain: int):
+        return (domain.bit_count(), -len(self.neighbors[course]))
+
+class DomainOverWeightedDegree(VariableOrdering):
+    """
+    dom/wdeg: the domain size divided by the weighted degree of the course. Every constraint
+    starts with a weight of 1 and each time revising it wipes out a domain the weight of
+    both courses is increased, so the courses involved in failures are chosen earlier.
+    """
+    weighted_degrees: dict[Course, int]
+
+    def __init__(self, courses: list[Course], neighbors: dict[Course, list[Course]]):
+        super().__init__(courses, neighbors)
+        self.weighted_degrees = {course: len(neighbors[course]) + 1 for course in courses}
+
+    def score(self, course: Course, domain: int):
+        return domain.bit_count() / self.weighted_degrees[course]
+
+    def carry_over(self, previous: VariableOrdering):
+        if isinstance(previous, DomainOverWeightedDegree):
+            self.weighted_degrees = dict(previous.weighted_degrees)
+
+    def wiped_out(self, course_i: Course, course_j: Course, domains: dict[Course, int]):
+        for course in (course_i, course_j):
+            self.weighted_degrees[course] += 1
+            self.push(course, domains[course])
+
+class ImpactBased(VariableOrdering):
+    """
+    Impact based search: the impact of an assignment is the share of the search space
+    (the product of the domain sizes) removed by its propagation, 1 for a failure. The
+    courses are scored by their domain size scaled down by their average impact, so
+    the courses whose assignments prune the most are chosen first.
+    """
+    log_size: float  # Logarithm of the current search space
+    impacts: dict[Course, float]
+    assignments: dict[Course, int]
+    log_size_before: list[float]
+
+    def __init__(self, courses: list[Course], neighbors: dict[Course, list[Course]]):
+        super().__init__(courses, neighbors)
+        self.log_size = 0.0
+        self.impacts = {course: 0.0 for course in courses}
+        self.assignments = {course: 0 for course in courses}
+        self.log_size_before = []
+
+    def start(self, domains: dict[Course, int]):
+        self.log_size = sum(log(domain.bit_count()) for domain in domains.values() if domain)
+        super().start(domains)
+
+    def score(self, course: Course, domain: int):
+        return domain.bit_count() * (1.0 - self.impacts[course])
+
+    def carry_over(self, previous: VariableOrdering):
+        if isinstance(previous, ImpactBased):
+            self.impacts = dict(previous.impacts)
+            self.assignments = dict(previous.assignments)
+
+    def domain_changed(self, course: Course, old_domain: int, new_domain: int):
+        if self.started and old_domain and new_domain:
+            self.log_size += log(new_domain.bit_count()) - log(old_domain.bit_count())
+        super().domain_changed(course, old_domain, new_domain)
+
+    def assigning(self, course: Course):
+        self.log_size_before.append(self.log_size)
+
+    def propagated(self, course: Course, success: bool):
+        before = self.log_size_before.pop()
+        impact = 1.0 - exp(self.log_size - before) if success else 1.0
+        count = self.assignments[course] = self.assignments[course] + 1
+        self.impacts[course] += (impact - self.impacts[course]) / count
+
+VARIABLE_ORDERINGS = {
+    "mrv": MinimumRemainingValues,
+    "mrv-degree": MinimumRemainingValuesDegree,
+    "dom-wdeg": DomainOverWeightedDegree,
+    "impact": ImpactBased,
+}
@@ -0,0 +1,99 @@
+"""
+Microbenchmark for `ARCAlgorithm.are_compatible`.
+
+Compares the precomputed tables against the reference check that works on
+(Classroom, staff, TimeInterval) tuples, both for single checks and for the
+support search done by `revise`, on the domains the search starts from. Run it
+from the root of the repository:
+
+    python -m benchmarks.compatibility example_full example_year_3
+"""
+import random
+import sys
+from timeit import timeit
+
+from algorithms.arc import ARCAlgorithm
+from algorithms.bitset import iter_bits
+from io_utils.generating_data import generate_courses
+from io_utils.reading_bkt import read_all_data
+
+PAIRS = 200_000
+SUPPORTS = 2_000
+ARCS = 500
+SEMESTER = 1
+
+def build_algorithm(input_name: str) -> tuple[ARCAlgorithm, dict]:
+    dataset = read_all_data(input_name)
+    if dataset is None:
+        raise SystemExit(f"Could not read input {input_name}")
+    courses = generate_courses(dataset.events, SEMESTER)
+
+    algo = ARCAlgorithm(courses, dataset)
+    # The domains the search starts from, with the hard constraints applied and arc consistent
+    domains = algo.preprocess()
+    if domains is None:
+        raise SystemExit(f"Input {input_name} has no schedule")
+    return algo, domains
+
+def sample_pairs(algo: ARCAlgorithm, domains: dict, count: int) -> list:
+    rng = random.Random(0)
+    courses = [course for course in algo.courses if domains[course]]
+    values = {course: list(iter_bits(domains[course])) for course in courses}
+    pairs = []
+    while len(pairs) < count:
+        course_i, course_j = rng.sample(courses, 2)
+        pairs.append((rng.choice(values[course_i]), rng.choice(values[course_j]), course_i, course_j))
+    return pairs
+
+def run(input_name: str):
+    algo, domains = build_algorithm(input_name)
+    pairs = sample_pairs(algo, domains, PAIRS)
+    values = algo.values
+
+    mismatches = sum(
+        algo.are_compatible(value_i, value_j, course_i, course_j)
+        != algo.are_assignments_compatible(values[value_i], values[value_j], course_i, course_j)
+        for value_i, value_j, course_i, course_j in pairs
+    )
+
+    reference = timeit(lambda: [algo.are_assignments_compatible(values[value_i], values[value_j], course_i, course_j)
+                                for value_i, value_j, course_i, course_j in pairs], number=1)
+    lookup = timeit(lambda: [algo.are_compatible(value_i, value_j, course_i, course_j)
+                             for value_i, value_j, course_i, course_j in pairs], number=1)
+
+    print(f"{input_name}: {len(algo.courses)} courses, {len(values)} values, {PAIRS} checks")
+    print(f"  tuple check:  {reference * 1e9 / PAIRS:8.1f} ns/check")
+    print(f"  table lookup: {lookup * 1e9 / PAIRS:8.1f} ns/check ({reference / lookup:.1f}x)")
+    print(f"  mismatches:   {mismatches}")
+
+    # Support search: does course_j still have a value compatible with value_i?
+    supports = pairs[:SUPPORTS]
+    domain_values = {course: [values[value] for value in iter_bits(domain)] for course, domain in domains.items()}
+    reference = timeit(lambda: [any(algo.are_assignments_compatible(values[value_i], assignment_j, course_i, course_j)
+                                    for assignment_j in domain_values[course_j])
+                                for value_i, _, course_i, course_j in supports], number=1)
+    lookup = timeit(lambda: [domains[course_j] & algo.incompatible_values(value_i, course_i, course_j) != domains[course_j]
+                             for value_i, _, course_i, course_j in supports], number=1)
+    # What `revise` does: the mask only when the domain of course_j lies in a single time interval
+    shortcut = timeit(lambda: [algo.spans_several_slots(domains[course_j])
+                               or domains[course_j] & algo.incompatible_values(value_i, course_i, course_j) != domains[course_j]
+                               for value_i, _, course_i, course_j in supports], number=1)
+    print(f"  support scan: {reference * 1e6 / SUPPORTS:8.1f} us/value")
+    print(f"  support mask: {lookup * 1e6 / SUPPORTS:8.1f} us/value ({reference / lookup:.1f}x)")
+    print(f"  slots + mask: {shortcut * 1e6 / SUPPORTS:8.1f} us/value ({reference / shortcut:.1f}x)")
+
+    # Revision of whole arcs of the constraint graph: the supports of every value of course_i
+    rng = random.Random(0)
+    arcs = [(course_i, rng.choice(algo.neighbors[course_i])) for course_i in rng.choices(
+        [course for course in algo.courses if algo.neighbors[course]], k=ARCS)]
+    reference = timeit(lambda: [[any(algo.are_assignments_compatible(values[value_i], assignment_j, course_i, course_j)
+                                     for assignment_j in domain_values[course_j])
+                                 for value_i in iter_bits(domains[course_i])]
+                                for course_i, course_j in arcs], number=1)
+    revised = timeit(lambda: [algo.revise(dict(domains), course_i, course_j, {}) for course_i, course_j in arcs], number=1)
+    print(f"  arc scan:     {reference * 1e6 / ARCS:8.1f} us/arc")
+    print(f"  revise:       {revised * 1e6 / ARCS:8.1f} us/arc ({reference / revised:.1f}x)")
+
+if __name__ == '__main__':
+    for input_name in sys.argv[1:] or ["example_full", "example_year_3"]:
+        run(input_name)
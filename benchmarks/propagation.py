@@ -0,0 +1,57 @@
+"""
+Benchmark of the arc consistency propagators of `ARCAlgorithm` (see `PROPAGATORS`).
+
+Each propagator runs the initial propagation, then a dive which assigns the courses
+one after the other (first value of the smallest domain) and propagates after every
+assignment, like the search does. Both must end with the same domains. Run it from
+the root of the repository:
+
+    python -m benchmarks.propagation example_hard example_year_3
+"""
+import sys
+from time import perf_counter
+
+from algorithms.arc import ARCAlgorithm, PROPAGATORS
+from algorithms.bitset import bit, lowest_bit
+from io_utils.generating_data import generate_courses
+from io_utils.reading_bkt import read_all_data
+
+SEMESTER = 1
+
+def dive(input_name: str, propagator: str) -> tuple[float, float, list]:
+    dataset = read_all_data(input_name)
+    if dataset is None:
+        raise SystemExit(f"Could not read input {input_name}")
+    courses = generate_courses(dataset.events, SEMESTER)
+
+    algo = ARCAlgorithm(courses, dataset, propagator=propagator)
+    # The domains the search starts from, with the hard constraints applied
+    domains = algo.prepare()
+
+    start = perf_counter()
+    consistent = algo.propagate(domains)
+    initial = perf_counter() - start
+
+    assignment = {}
+    start = perf_counter()
+    while consistent and len(assignment) < len(courses):
+        course = algo.select_unassigned_variable(assignment, domains)
+        value = lowest_bit(domains[course])
+        assignment[course] = value
+        domains[course] = bit(value)
+        consistent = algo.propagate(domains, assignment, [course])
+    search = perf_counter() - start
+
+    return initial, search, [domains[course] for course in courses]
+
+def run(input_name: str):
+    print(input_name)
+    results = {}
+    for propagator in PROPAGATORS:
+        initial, search, results[propagator] = dive(input_name, propagator)
+        print(f"  {propagator:8} initial: {initial:8.3f}s  dive: {search:8.3f}s")
+    print(f"  same domains: {all(domains == results[PROPAGATORS[0]] for domains in results.values())}")
+
+if __name__ == '__main__':
+    for input_name in sys.argv[1:] or ["example_hard", "example_year_3"]:
+        run(input_name)
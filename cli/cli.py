@@ -1,32 +1,59 @@
 import argparse
-import os
+from typing import Optional
 
 import argcomplete
 
+from algorithms.arc import PROPAGATORS
+from algorithms.local_search import LOCAL_SEARCH_METHODS
+from algorithms.restarts import RESTART_SCHEDULES
+from algorithms.value_ordering import VALUE_ORDERINGS
+from algorithms.variable_ordering import VARIABLE_ORDERINGS
+
 class Args:
     algorithm: str
     input: str
-    semester: int
-
-def parse() -> tuple[str, str, int]:
-    input_file: str = 'example_bkt'
-    algorithm: str = 'bkt'
-    semester: int = 1
+    semester: Optional[int]
+    propagator: str
+    variable_ordering: str
+    value_ordering: str
+    skip_feasibility: bool
+    symmetry_breaking: Optional[bool]  # None: the default of the algorithm
+    workers: Optional[int]
+    restarts: Optional[str]
+    restart_base: int
+    keep_weights: bool
+    seed: Optional[int]
+    time_limit: float
+    local_search: Optional[str]
+    node_limit: int
 
+def parse() -> Args:
     # For now autocomplete works only macos/Linux
     # if (os.name == 'posix'):
     parser = argparse.ArgumentParser(description="A CLI script with autocompletion.")
 
     # Define some arguments
-    parser.add_argument("algorithm", choices=["bkt", "counting-bkt", "arc", "arc-bkt"], help="Algorithm to use.")
-    parser.add_argument("semester", choices=["1", "2"], help="For which semester should we generate the timetable")
+    parser.add_argument("algorithm", choices=["bkt", "counting-bkt", "counting-dp", "estimate-count", "arc", "arc-bkt", "portfolio", "optimize", "lns", "min-conflicts"], help="Algorithm to use.")
+    parser.add_argument("semester", choices=["1", "2", "all"], help="For which semester should we generate the timetable")
     parser.add_argument("input", choices=["example_bkt", "example_hard", "example_year_3", "example_validate_error", "example_full", "example_cannot_generate", "example_not_enough_staff", "example_too_many_groups", "example_small_sample"], help="Input file to consider")
+    parser.add_argument("--propagator", choices=PROPAGATORS, default="ac3", help="Arc consistency algorithm used by arc-bkt.")
+    parser.add_argument("--variable-ordering", choices=list(VARIABLE_ORDERINGS), default="mrv", help="Heuristic choosing the next course to assign in arc-bkt.")
+    parser.add_argument("--value-ordering", choices=list(VALUE_ORDERINGS), default="static", help="Order in which arc-bkt tries the values of a course.")
+    parser.add_argument("--symmetry-breaking", dest="symmetry_breaking", action="store_true", default=None, help="Explore one of the interchangeable classrooms and groups when solving (the default of counting-bkt). It can change the timetable found.")
+    parser.add_argument("--no-symmetry-breaking", dest="symmetry_breaking", action="store_false", default=None, help="Explore the interchangeable classrooms and groups one by one when counting (the default of the other algorithms).")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes counting the schedules in counting-bkt and estimate-count (1 by default), or solvers run by portfolio (all of them by default).")
+    parser.add_argument("--restarts", choices=list(RESTART_SCHEDULES), default=None, help="Restart bkt and arc-bkt after a number of failed assignments following this schedule.")
+    parser.add_argument("--restart-base", type=int, default=100, help="Number of failed assignments the restart schedule is scaled by.")
+    parser.add_argument("--no-keep-weights", dest="keep_weights", action="store_false", help="Forget the weights learned by the variable ordering of arc-bkt when restarting.")
+    parser.add_argument("--seed", type=int, default=None, help="Break the ties of bkt and arc-bkt at random with this seed, or seed the random searches.")
+    parser.add_argument("--time-limit", type=float, default=60.0, help="Seconds optimize, lns, min-conflicts, estimate-count or the local search of arc-bkt run for.")
+    parser.add_argument("--node-limit", type=int, default=1000, help="Nodes of the search repairing each region in lns.")
+    parser.add_argument("--local-search", choices=LOCAL_SEARCH_METHODS, default=None, help="Improve the timetable found by arc-bkt with this local search until the time limit.")
+    parser.add_argument("--skip-feasibility", action="store_true", help="Do not check the input for obvious infeasibility before solving.")
 
     # Enable autocompletion with argcomplete
     argcomplete.autocomplete(parser)
 
     args = parser.parse_args(namespace=Args)
-    input_file = args.input
-    semester = int(args.semester)
-    algorithm = args.algorithm
-    return (algorithm, input_file, semester)
\ No newline at end of file
+    args.semester = None if args.semester == "all" else int(args.semester)
+    return args
\ No newline at end of file
@@ -0,0 +1,82 @@
+from typing import Optional
+
+import numpy as np
+
+import models.constants as consts
+from models.classroom import Classroom
+from models.constraints.constraint import Constraint
+from models.event import Event
+from models.staff_member import StaffMember
+
+class Dataset:
+    """
+    The data of an input, as returned by `read_all_data`, with indexes to resolve
+    the ids and names used by courses, solutions and constraints in O(1).
+
+    The availabilities of the classrooms and of the staff members are stacked in one tensor
+    each, the `availability` of every object being a view into its row, so they can be
+    checked for all the classrooms or staff members at once.
+    """
+    classrooms: list[Classroom]
+    staff_members: list[StaffMember]
+    events: list[Event]
+    constraints: list[Constraint]
+    events_by_id: dict[str, Event]
+    staff_by_id: dict[str, StaffMember]
+    staff_by_name: dict[str, StaffMember]
+    classrooms_by_id: dict[str, Classroom]
+    classroom_availability: np.ndarray  # classrooms x 6 x 5, in the order of `classrooms`
+    staff_availability: np.ndarray  # staff members x 6 x 5, in the order of `staff_members`
+    classroom_rows: dict[str, int]  # Classroom id -> row of `classroom_availability`
+    staff_rows: dict[str, int]  # Staff member id -> row of `staff_availability`
+
+    def __init__(self, classrooms: list[Classroom], staff_members: list[StaffMember], events: list[Event],
+                 constraints: Optional[list[Constraint]]):
+        self.classrooms = classrooms
+        self.staff_members = staff_members
+        self.events = events
+        self.constraints = constraints or []
+
+        # When an id or a name is used twice the first one wins, like the scans these indexes replace
+        self.events_by_id = {}
+        for event in events:
+            self.events_by_id.setdefault(event.get_id(), event)
+        self.staff_by_id = {}
+        self.staff_by_name = {}
+        for staff_member in staff_members:
+            self.staff_by_id.setdefault(staff_member.get_id(), staff_member)
+            self.staff_by_name.setdefault(staff_member.get_name(), staff_member)
+        self.classrooms_by_id = {}
+        for classroom in classrooms:
+            self.classrooms_by_id.setdefault(classroom.get_id(), classroom)
+
+        self.classroom_availability = stack_availabilities(classrooms)
+        self.staff_availability = stack_availabilities(staff_members)
+        self.classroom_rows = {}
+        for row, classroom in enumerate(classrooms):
+            self.classroom_rows.setdefault(classroom.get_id(), row)
+            classroom.availability = self.classroom_availability[row]
+        self.staff_rows = {}
+        for row, staff_member in enumerate(staff_members):
+            self.staff_rows.setdefault(staff_member.get_id(), row)
+            staff_member.availability = self.staff_availability[row]
+
+    def get_event(self, event_id: str) -> Optional[Event]:
+        return self.events_by_id.get(event_id)
+
+    def get_staff_member(self, staff_member_id: str) -> Optional[StaffMember]:
+        return self.staff_by_id.get(staff_member_id)
+
+    def get_staff_member_by_name(self, name: str) -> Optional[StaffMember]:
+        return self.staff_by_name.get(name)
+
+    def get_classroom(self, classroom_id: str) -> Optional[Classroom]:
+        return self.classrooms_by_id.get(classroom_id)
+
+def stack_availabilities(items: list) -> np.ndarray:
+    """
+    Copies the availabilities of the classrooms or staff members into one tensor.
+    """
+    if not items:
+        return np.zeros((0,) + consts.BASIC_AVAILABILITY.shape, dtype=consts.BASIC_AVAILABILITY.dtype)
+    return np.stack([item.availability for item in items])
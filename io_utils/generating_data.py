@@ -1,13 +1,13 @@
 from models.event import Event
 from models.course import Course, CourseType
-from typing import List
+from typing import List, Optional
 
-def generate_courses(events: List[Event], semester: int) -> List[Course]:
+def generate_courses(events: List[Event], semester: Optional[int]) -> List[Course]:
     courses = []
 
     for event in events:
-        # We will not add the events for the other semester
-        if event.get_semester() % 2 != semester % 2:
+        # We will not add the events for the other semester, None keeps both
+        if semester is not None and event.get_semester() % 2 != semester % 2:
             continue
         if 'Engleza' in event.get_name():
             for i in range (1, 6):
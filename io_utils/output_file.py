@@ -7,6 +7,13 @@ class OutputFile:
     def close(self):
         self.file.close()
 
+    def clear(self):
+        self.file.seek(0)
+        self.file.truncate()
+
+    def flush(self):
+        self.file.flush()
+
     def write_and_log(self, *data):
         self.write(*data)
         print(*data)
@@ -10,6 +10,7 @@ from models.constraints.unavailable_classroom_time import UnavailableClassroomTi
 from models.constraints.unavailable_staff_time import UnavailableStaffTime
 from models.staff_member import StaffMember
 from models.event import Event
+from io_utils.dataset import Dataset
 
 def _read_classrooms(data_set_path: str) -> Optional[list[Classroom]]:
     is_valid = True
@@ -93,7 +94,7 @@ def _read_events(data_set_path: str) -> Optional[list[Event]]:
 
     return None if not is_valid else [event.unwrap() for event in events]
 
-def read_all_data(data_set_path: str) -> Optional[tuple[list[Classroom], list[StaffMember], list[Event], list[Constraint] | None]]:
+def read_all_data(data_set_path: str) -> Optional[Dataset]:
     classrooms = _read_classrooms(data_set_path)
     staff_members = _read_staff_members(data_set_path)
     events = _read_events(data_set_path)
@@ -110,4 +111,4 @@ def read_all_data(data_set_path: str) -> Optional[tuple[list[Classroom], list[St
             print(f"Ids for event {event.get_name()} are not corelated with any staff members with id {unknown_ids}.")
             is_valid = False
 
-    return None if not classrooms or not staff_members or not events or not is_valid else (classrooms, staff_members, events, constraints)
\ No newline at end of file
+    return None if not classrooms or not staff_members or not events or not is_valid else Dataset(classrooms, staff_members, events, constraints)
\ No newline at end of file
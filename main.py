@@ -4,58 +4,131 @@ from icecream import ic
 
 from algorithms.arc import ARCAlgorithm
 from algorithms.bkt import BKTAlgorithm
+from algorithms.component_counting import ComponentCounter
+from algorithms.estimation import estimate_count
+from algorithms.feasibility import FeasibilityAnalyzer
+from algorithms.lns import LargeNeighborhoodSearch
+from algorithms.local_search import LocalSearch
+from algorithms.min_conflicts import MinConflicts
+from algorithms.optimizer import BranchAndBound
+from algorithms.parallel_counting import count_in_parallel
+from algorithms.portfolio import run_portfolio
 from cli import cli
+from io_utils.dataset import Dataset
 from io_utils.reading_bkt import read_all_data
 from io_utils.generating_data import generate_courses
 from io_utils.output_file import OutputFile
 
-ALGORITHM, INPUT, SEMESTER = cli.parse()
+ARGS = cli.parse()
+ALGORITHM, INPUT, SEMESTER = ARGS.algorithm, ARGS.input, ARGS.semester
+# Symmetry breaking is sound for counting, when solving it would change the timetable found
+SYMMETRY_BREAKING = ARGS.symmetry_breaking if ARGS.symmetry_breaking is not None else ALGORITHM == "counting-bkt"
+# The modes built on `BKTAlgorithm`, which does not enforce the hard unavailabilities
+BKT_ALGORITHMS = ["bkt", "counting-bkt", "counting-dp", "estimate-count"]
 ic(ALGORITHM, INPUT, SEMESTER)
 
+def write_solution(output_file: OutputFile, dataset: Dataset, solution: list, log: bool = True):
+    write = output_file.write_and_log if log else output_file.write
+    for course, (classroom, ids, interval) in solution:
+        event = dataset.get_event(course.get_event_id())
+        profs = [dataset.get_staff_member(s_id) for s_id in ids]
+        write(event.get_name(), event.get_semester(), course.get_type(), course.get_group())
+        write(classroom.get_id(), interval)
+        profss = ""
+        for prof in profs:
+            profss += prof.get_name() + ","
+        write(profss)
+
 def main():
-    data = read_all_data(INPUT)
-    if data is None:
+    dataset = read_all_data(INPUT)
+    if dataset is None:
         exit(-1)
 
-    classrooms, staff_members, events, constraints = data
-    courses = generate_courses(events, SEMESTER)
+    courses = generate_courses(dataset.events, SEMESTER)
+
+    if not ARGS.skip_feasibility:
+        explanations = FeasibilityAnalyzer(courses, dataset, availabilities=ALGORITHM not in BKT_ALGORITHMS).analyze()
+        if explanations:
+            print("No schedule possible:")
+            for explanation in explanations:
+                print(f"  {explanation}")
+            exit(-1)
 
     output_file = OutputFile('outputs/to_format.txt')
     time_start = perf_counter()
     if (ALGORITHM == 'bkt'):
-        algo = BKTAlgorithm(courses, classrooms, staff_members, events)
-        if not algo.backtrack(0):
+        algo = BKTAlgorithm(courses, dataset, symmetry_breaking=SYMMETRY_BREAKING, seed=ARGS.seed,
+                            restarts=ARGS.restarts, restart_base=ARGS.restart_base)
+        if not algo.solve():
             print("No schedule possible")
         else:
-            for solution in algo.solution:
-                (course, (classroom, ids, interval)) = solution
-                event = next(x for x in events if course.get_event_id() == x.get_id())
-                profs = list(filter(lambda x: any(x.get_id() == s_id for s_id in ids), staff_members))
-                output_file.write_and_log(event.get_name(), event.get_semester(), course.get_type(), course.get_group())
-                output_file.write_and_log(classroom.get_id(), interval)
-                profss = ""
-                for prof in profs:
-                    profss += prof.get_name() + ","
-                output_file.write_and_log(profss)
+            write_solution(output_file, dataset, algo.solution)
     elif (ALGORITHM == "counting-bkt"):
-        algo = BKTAlgorithm(courses, classrooms, staff_members, events)
+        if ARGS.workers is not None and ARGS.workers > 1:
+            print(count_in_parallel(courses, dataset, ARGS.workers, symmetry_breaking=SYMMETRY_BREAKING))
+        else:
+            algo = BKTAlgorithm(courses, dataset, symmetry_breaking=SYMMETRY_BREAKING)
 
-        print(algo.backtrack_counting(0))
+            print(algo.backtrack_counting())
+    elif ALGORITHM == "counting-dp":
+        print(ComponentCounter(courses, dataset).count())
+    elif ALGORITHM == "estimate-count":
+        print(estimate_count(courses, dataset, ARGS.workers, time_limit=ARGS.time_limit, seed=ARGS.seed,
+                             symmetry_breaking=SYMMETRY_BREAKING))
     elif ALGORITHM == 'arc-bkt':
-        algo = ARCAlgorithm(courses, classrooms, staff_members, events, constraints)
+        algo = ARCAlgorithm(courses, dataset, propagator=ARGS.propagator,
+                            variable_ordering=ARGS.variable_ordering, value_ordering=ARGS.value_ordering,
+                            symmetry_breaking=SYMMETRY_BREAKING, seed=ARGS.seed,
+                            restarts=ARGS.restarts, restart_base=ARGS.restart_base, keep_weights=ARGS.keep_weights)
         if algo.solve():
-            for solution in algo.solution:
-                (course, (classroom, ids, interval)) = solution
-                event = next(x for x in events if course.get_event_id() == x.get_id())
-                profs = list(filter(lambda x: any(x.get_id() == s_id for s_id in ids), staff_members))
-                output_file.write_and_log(event.get_name(), event.get_semester(), course.get_type(), course.get_group())
-                output_file.write_and_log(classroom.get_id(), interval)
-                profss = ""
-                for prof in profs:
-                    profss += prof.get_name() + ","
-                output_file.write_and_log(profss)
+            solution = algo.solution
+            if ARGS.local_search is not None:
+                local_search = LocalSearch(algo, ARGS.local_search, time_limit=ARGS.time_limit, seed=ARGS.seed)
+                print(f"Best cost: {local_search.solve()} after {local_search.changes} changes")
+                solution = local_search.best_solution
+            write_solution(output_file, dataset, solution)
         else:
             print("No schedule possible with ARC consistency.")
+    elif ALGORITHM == 'optimize':
+        optimizer = BranchAndBound(courses, dataset, propagator=ARGS.propagator,
+                                   variable_ordering=ARGS.variable_ordering, symmetry_breaking=SYMMETRY_BREAKING,
+                                   time_limit=ARGS.time_limit)
+        if optimizer.solve():
+            print(f"Best cost: {optimizer.best_cost}" + (" (optimal)" if optimizer.optimal else ""))
+            write_solution(output_file, dataset, optimizer.best_solution)
+        elif optimizer.optimal:
+            print("No schedule possible with ARC consistency.")
+        else:
+            print(f"No schedule found within the time limit of {ARGS.time_limit}s.")
+    elif ALGORITHM == 'lns':
+        def stream(solution: list):
+            # The file always holds the best timetable so far
+            output_file.clear()
+            write_solution(output_file, dataset, solution, log=False)
+            output_file.flush()
+
+        lns = LargeNeighborhoodSearch(courses, dataset, time_limit=ARGS.time_limit, node_limit=ARGS.node_limit,
+                                      seed=ARGS.seed, on_improvement=stream)
+        if lns.solve():
+            print(f"Every course scheduled, cost {lns.cost}, after {lns.repairs} repairs")
+        else:
+            print(f"{len(lns.unassigned)} courses could not be scheduled after {lns.repairs} repairs")
+        output_file.clear()
+        write_solution(output_file, dataset, lns.timetable())
+    elif ALGORITHM == 'min-conflicts':
+        algo = MinConflicts(courses, dataset, time_limit=ARGS.time_limit, seed=ARGS.seed)
+        if algo.solve():
+            write_solution(output_file, dataset, algo.solution)
+        else:
+            print("No schedule found with min-conflicts.")
+    elif ALGORITHM == 'portfolio':
+        result = run_portfolio(courses, dataset, ARGS.workers, symmetry_breaking=SYMMETRY_BREAKING)
+        if result is None:
+            print("No schedule possible")
+        else:
+            configuration, solution = result
+            print(f"Solved by {configuration}")
+            write_solution(output_file, dataset, solution)
     else:
         print("Algorithm not implemented")
 
@@ -69,7 +69,8 @@ class Classroom:
 
         self.__id = id_
         self.__type = type
-        self.availability = consts.BASIC_AVAILABILITY
+        # A copy, writing into the shared matrix would change every classroom. `Dataset` replaces it by a view into its tensor.
+        self.availability = consts.BASIC_AVAILABILITY.copy()
 
     def get_id(self) -> str:
         return self.__id
@@ -26,7 +26,7 @@ def create_constraint(data: Dict[str, Any]) -> Result[Constraint, str]:
                 weight=data["weight"],
             )
         case ConstraintType.PREFERRED_EVENT.value:
-            return Success(PreferredEvent(
+            return PreferredEvent.create(
                 classroom=data["classroom"],
                 instructor=data["instructor"],
                 course=data["course"],
@@ -34,6 +34,6 @@ def create_constraint(data: Dict[str, Any]) -> Result[Constraint, str]:
                 event_type=data["event_type"],
                 preferred_time=data["preferred_time"],
                 weight=data["weight"],
-            ))
+            )
         case _:
             return Failure(f"Unknown constraint type: {data['type']}")
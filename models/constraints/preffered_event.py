@@ -62,7 +62,7 @@ class PreferredEvent(Constraint):
         if err:
             return Failure(err)
 
-        return Success(PreferredEvent(classroom, instructor ,course, group, CourseType.LECTURE, time_intervals, weight))
+        return Success(PreferredEvent(classroom, instructor ,course, group, event_type_result.unwrap(), time_intervals, weight))
     
     def get_classroom_id(self) -> str:
         return self.__classroom
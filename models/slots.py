@@ -0,0 +1,38 @@
+from models.time_interval import Day, Interval, TimeInterval
+
+# The catalog of the time intervals of a week. `TimeInterval` values are codes (1-6 for
+# Monday, 11-16 for Tuesday, ...): every time interval also gets a dense index from 0 to 29,
+# in the order of the week, and what is derived from it is read from a table: the (line, col)
+# cell of the availability matrices, the day, the interval of the day and the label. The
+# solvers can work on the indices and convert back to `TimeInterval` only for the output.
+
+SLOTS: list[TimeInterval] = sorted(TimeInterval, key=lambda time_interval: time_interval.value)
+SLOT_COUNT = len(SLOTS)
+HOURS = len(Interval)  # Time intervals in a day
+DAYS = len(Day)
+
+INDEX: dict[TimeInterval, int] = {time_interval: index for index, time_interval in enumerate(SLOTS)}
+DAY_INDEX: list[int] = [index // HOURS for index in range(SLOT_COUNT)]  # 0 for Monday
+HOUR_INDEX: list[int] = [index % HOURS for index in range(SLOT_COUNT)]  # 0 for 08:00-10:00
+# (line, col) in the availability matrices: a line per interval of the day, a column per day
+CELLS: list[tuple[int, int]] = [(HOUR_INDEX[index], DAY_INDEX[index]) for index in range(SLOT_COUNT)]
+SLOT_DAYS: list[Day] = [list(Day)[DAY_INDEX[index]] for index in range(SLOT_COUNT)]
+SLOT_INTERVALS: list[Interval] = [list(Interval)[HOUR_INDEX[index]] for index in range(SLOT_COUNT)]
+LABELS: list[str] = [f"{day.value[0]} {interval.value[0]}" for day, interval in zip(SLOT_DAYS, SLOT_INTERVALS)]
+# Slot index of each (day, hour)
+BY_DAY_HOUR: list[list[int]] = [[day * HOURS + hour for hour in range(HOURS)] for day in range(DAYS)]
+
+def index(time_interval: TimeInterval) -> int:
+    return INDEX[time_interval]
+
+def cell(time_interval: TimeInterval) -> tuple[int, int]:
+    return CELLS[INDEX[time_interval]]
+
+def day(time_interval: TimeInterval) -> int:
+    return DAY_INDEX[INDEX[time_interval]]
+
+def hour(time_interval: TimeInterval) -> int:
+    return HOUR_INDEX[INDEX[time_interval]]
+
+def label(time_interval: TimeInterval) -> str:
+    return LABELS[INDEX[time_interval]]
@@ -96,4 +96,4 @@ class StaffMember:
         DO NOT USE THIS METHOD OUTSIDE the `StaffMember` class.
         """
         self.__id = id_
-        self.availability = consts.BASIC_AVAILABILITY
+        self.availability = consts.BASIC_AVAILABILITY.copy()
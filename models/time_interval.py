@@ -11,11 +11,13 @@ class Day(Enum):
 
     @staticmethod
     def from_string(day: str) -> Result["Day", str]:
-        for d in Day:
-            if d.value[0].lower() == day.lower():
-                return Success(d)
+        found = _DAYS_BY_NAME.get(day.lower())
+        if found is not None:
+            return Success(found)
         return Failure(f"Invalid day '{day}'.\n")
 
+_DAYS_BY_NAME = {d.value[0].lower(): d for d in Day}
+
 class Interval(Enum):
     INTERVAL_1 = ("08:00-10:00", 1)
     INTERVAL_2 = ("10:00-12:00", 2)
@@ -26,11 +28,13 @@ class Interval(Enum):
 
     @staticmethod
     def from_string(interval: str) -> Result["Interval", str]:
-        for d in Interval:
-            if d.value[0].lower() == interval.lower():
-                return Success(d)
+        found = _INTERVALS_BY_NAME.get(interval.lower())
+        if found is not None:
+            return Success(found)
         return Failure(f"Invalid time interval '{interval}'.\n")
 
+_INTERVALS_BY_NAME = {d.value[0].lower(): d for d in Interval}
+
 '''
     We read M1 as interval: Monday 8:00-10:00
     Digit 1 means 8:00-10:00
@@ -77,9 +81,8 @@ class TimeInterval(Enum):
     F6 = 46
 
     def convertToMatrixIndices(self) -> tuple[int, int]:
-        line = int(self.value) % 10 - 1
-        col = int(self.value) // 10
-        return (line, col)
+        # Computed once for every time interval, see `models.slots` for the dense indices
+        return _MATRIX_INDICES[self]
     
     @staticmethod
     def from_input(day: str, value: str) -> Result['TimeInterval', str]:
@@ -96,4 +99,6 @@ class TimeInterval(Enum):
         if err:
             return Failure(err)
         
-        return Success(TimeInterval((day_result.unwrap().value[1] - 1) * 10 + interval_result.unwrap().value[1]))
\ No newline at end of file
+        return Success(TimeInterval((day_result.unwrap().value[1] - 1) * 10 + interval_result.unwrap().value[1]))
+
+_MATRIX_INDICES = {t: (t.value % 10 - 1, t.value // 10) for t in TimeInterval}
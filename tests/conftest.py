@@ -0,0 +1,10 @@
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    # The inputs are read from paths relative to the root of the repository
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,11 @@
+from io_utils.dataset import Dataset
+from io_utils.generating_data import generate_courses
+from io_utils.reading_bkt import read_all_data
+from models.course import Course
+
+def load(name: str, semester: int = 1) -> tuple[Dataset, list[Course]]:
+    """
+    The dataset of an input and the courses of a semester, like `main.py` builds them.
+    """
+    dataset = read_all_data(name)
+    return dataset, generate_courses(dataset.events, semester)
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from algorithms.arc import PROPAGATORS, ARCAlgorithm, DomainType
+from algorithms.bitset import iter_bits
+from algorithms.restarts import RESTART_SCHEDULES
+from algorithms.value_ordering import VALUE_ORDERINGS
+from algorithms.variable_ordering import VARIABLE_ORDERINGS
+from models.constraints.constants import Weight
+from models.constraints.unavailable_classroom_time import UnavailableClassroomTime
+from models.constraints.unavailable_staff_time import UnavailableStaffTime
+from models.course import Course
+from models.time_interval import TimeInterval
+from tests.helpers import load
+
+def random_instance(seed: int):
+    """
+    A few courses of example_small_sample, with the staff members and the classrooms free only
+    in a few time intervals, mostly the same ones: some of the instances have no schedule.
+    """
+    rng = random.Random(seed)
+    dataset, courses = load("example_small_sample")
+    courses = rng.sample(courses, rng.randint(5, 8))
+    free = rng.sample(list(TimeInterval), rng.randint(4, 6))
+
+    def unavailability() -> list[TimeInterval]:
+        return [time_interval for time_interval in TimeInterval if time_interval not in free or rng.random() < 0.3]
+
+    for staff_member in dataset.staff_members:
+        dataset.constraints.append(UnavailableStaffTime(staff_member.get_name(), unavailability(), Weight.HARD.value))
+    for classroom in dataset.classrooms:
+        dataset.constraints.append(UnavailableClassroomTime(classroom.get_id(), unavailability(), Weight.HARD.value))
+    return dataset, courses
+
+def exists(algo: ARCAlgorithm, courses: list[Course], domains: dict[Course, DomainType], assignment: dict[Course, int]) -> bool:
+    """
+    Chronological backtracking over the domains, without propagation, backjumping or nogoods.
+    """
+    if len(assignment) == len(courses):
+        return True
+    course = courses[len(assignment)]
+    for value in iter_bits(domains[course]):
+        if algo.is_consistent(course, value, assignment):
+            assignment[course] = value
+            if exists(algo, courses, domains, assignment):
+                return True
+            del assignment[course]
+    return False
+
+@pytest.mark.parametrize("seed", range(60))
+def test_backjumping_and_nogoods_keep_every_solution(seed):
+    dataset, courses = random_instance(seed)
+    reference = ARCAlgorithm(courses, dataset)
+    domains = reference.prepare()
+    ordered = sorted(courses, key=lambda course: domains[course].bit_count())
+    expected = exists(reference, ordered, domains, {})
+
+    rng = random.Random(seed)
+    # With short restarts, the nogoods learned in a run prune the next ones
+    for restarts in (None, rng.choice(list(RESTART_SCHEDULES))):
+        algo = ARCAlgorithm(courses, dataset, propagator=rng.choice(PROPAGATORS),
+                            variable_ordering=rng.choice(list(VARIABLE_ORDERINGS)),
+                            value_ordering=rng.choice(list(VALUE_ORDERINGS)), nogood_limit=rng.choice([4, 10_000]),
+                            seed=seed, restarts=restarts, restart_base=3)
+        assert algo.solve() == expected
+        if expected:
+            assert algo.is_valid_solution(algo.solution)
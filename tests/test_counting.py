@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from algorithms.bkt import BKTAlgorithm
+from algorithms.component_counting import ComponentCounter
+from algorithms.parallel_counting import count_in_parallel
+from io_utils.dataset import Dataset
+from models.classroom import ClassroomType
+from models.course import Course, CourseType
+from tests.helpers import load
+
+def one_classroom_per_type(dataset: Dataset) -> Dataset:
+    """
+    The dataset with only its first lecture and laboratory classrooms, so that a few courses
+    have few enough schedules for `BKTAlgorithm` to enumerate them.
+    """
+    classrooms = [next(classroom for classroom in dataset.classrooms if classroom.get_type() == classroom_type)
+                  for classroom_type in (ClassroomType.LECTURE, ClassroomType.LABORATORY)]
+    return Dataset(classrooms, dataset.staff_members, dataset.events, dataset.constraints)
+
+def random_pair(courses: list[Course], rng: random.Random) -> list[Course]:
+    """
+    Two courses of the input, half of the time two courses of the same event and type: the
+    courses of groups which can be renamed into each other (see `Symmetries`).
+    """
+    first = rng.choice(courses)
+    siblings = [course for course in courses if course is not first and course.get_event_id() == first.get_event_id()
+                and course.get_type() == first.get_type()]
+    others = [course for course in courses if course is not first]
+    return [first, rng.choice(siblings if siblings and rng.random() < 0.5 else others)]
+
+@pytest.mark.parametrize("seed", range(30))
+def test_symmetry_breaking_keeps_the_count(seed):
+    dataset, courses = load("example_hard")
+    courses = random_pair(courses, random.Random(seed))
+    count = BKTAlgorithm(courses, dataset).backtrack_counting()
+    assert count > 0
+    assert BKTAlgorithm(courses, dataset, symmetry_breaking=True).backtrack_counting() == count
+
+@pytest.mark.parametrize("symmetry_breaking", [True, False])
+def test_parallel_count_is_the_serial_count(symmetry_breaking):
+    dataset, courses = load("example_small_sample")
+    courses = random.Random(1).sample(courses, 3)
+    count = BKTAlgorithm(courses, dataset).backtrack_counting()
+    assert count_in_parallel(courses, dataset, workers=2, symmetry_breaking=symmetry_breaking) == count
+
+@pytest.mark.parametrize("seed", range(15))
+def test_component_count_is_the_backtracking_count(seed):
+    dataset, courses = load("example_hard")
+    dataset = one_classroom_per_type(dataset)
+    courses = random.Random(seed).sample(courses, 3)
+    assert ComponentCounter(courses, dataset).count() == BKTAlgorithm(courses, dataset).backtrack_counting()
+
+@pytest.mark.parametrize("seed", range(5))
+def test_components_are_counted_apart(seed):
+    dataset, courses = load("example_hard")
+    counter = ComponentCounter(courses, dataset)
+    lectures = [course for course in courses if course.get_type() == CourseType.LECTURE]
+    laboratories = [course for course in courses if course.get_type() == CourseType.LABORATORY]
+    courses = list(random.Random(seed).choice([(lecture, laboratory) for lecture in lectures for laboratory in laboratories
+                                               if not counter.interact(lecture, laboratory)]))
+    counter = ComponentCounter(courses, dataset)
+    assert len(counter.components) == 2
+    assert counter.count() == BKTAlgorithm(courses, dataset).backtrack_counting()
@@ -0,0 +1,79 @@
+import random
+from decimal import Decimal
+from statistics import stdev
+from time import perf_counter
+
+import pytest
+
+from algorithms.bkt import BKTAlgorithm
+from algorithms.component_counting import ComponentCounter
+from algorithms.estimation import Z_95, CountEstimate, estimate_count, probe
+from models.course import CourseType
+from tests.helpers import load
+
+class FixedPick:
+    """
+    Stands for the `random.Random` of a probe of two courses, which draws a single number.
+    """
+    def __init__(self, pick: int):
+        self.pick = pick
+
+    def randrange(self, total: int) -> int:
+        assert self.pick < total
+        return self.pick
+
+@pytest.mark.parametrize("symmetry_breaking", [True, False])
+def test_probes_average_to_the_count(symmetry_breaking):
+    # The labs of A1 and A2, which can be renamed, in classrooms of the same class: the
+    # probes of every pick of the first one average to the exact count
+    dataset, courses = load("example_hard")
+    first = next(course for course in courses if course.get_group() == "A1" and course.get_type() == CourseType.LABORATORY)
+    second = next(course for course in courses if course.get_group() == "A2" and course.get_event_id() == first.get_event_id()
+                  and course.get_type() == CourseType.LABORATORY)
+    algo = BKTAlgorithm([first, second], dataset, symmetry_breaking=symmetry_breaking)
+    total = sum(weight for _, _, _, weight in algo.candidates(first))
+    estimates = [probe(algo, FixedPick(pick)) for pick in range(total)]
+    assert sum(estimates) == total * BKTAlgorithm([first, second], dataset).backtrack_counting()
+    assert probe(BKTAlgorithm([], dataset), random.Random(0)) == 1
+
+def test_confidence_interval():
+    rng = random.Random(0)
+    estimates = [rng.randrange(10 ** 20) for _ in range(50)]
+    estimate = CountEstimate(estimates)
+    assert estimate.mean == Decimal(sum(estimates)) / 50
+    error = float(Z_95) * stdev(estimates) / 50 ** 0.5
+    assert float(estimate.high - estimate.mean) == pytest.approx(error)
+    assert float(estimate.mean - estimate.low) == pytest.approx(error)
+    # The interval is cut at 0, a single probe gives no interval
+    assert CountEstimate([0, 0, 0, 10 ** 6]).low == 0
+    single = CountEstimate([42])
+    assert single.low == single.mean == single.high == 42
+
+def test_confidence_interval_holds_the_count():
+    dataset, courses = load("example_small_sample")
+    courses = random.Random(1).sample(courses, 3)
+    algo = BKTAlgorithm(courses, dataset)
+    rng = random.Random(0)
+    estimate = CountEstimate([probe(algo, rng) for _ in range(300)])
+    assert estimate.low <= ComponentCounter(courses, dataset).count() <= estimate.high
+    assert estimate.high - estimate.low < estimate.mean / 2
+
+def test_estimate_count():
+    dataset, courses = load("example_small_sample")
+    courses = random.Random(1).sample(courses, 3)
+    # Past the time limit a single probe is run
+    estimate = estimate_count(courses, dataset, time_limit=0, seed=0)
+    assert estimate.probes == 1
+    assert estimate.low == estimate.mean == estimate.high > 0
+    estimate = estimate_count(courses, dataset, workers=2, time_limit=0.5, seed=0)
+    assert estimate.probes > 1
+    assert estimate.low <= estimate.mean <= estimate.high
+
+def test_estimate_count_without_courses():
+    dataset, _ = load("example_small_sample")
+    # Counted right away, not probed until the time limit
+    start = perf_counter()
+    estimate = estimate_count([], dataset, time_limit=60)
+    assert perf_counter() - start < 10
+    assert estimate.probes == 1
+    assert estimate.low == estimate.mean == estimate.high == 1
@@ -0,0 +1,14 @@
+from algorithms.feasibility import FeasibilityAnalyzer
+from models.constraints.constants import Weight
+from models.constraints.unavailable_staff_time import UnavailableStaffTime
+from models.time_interval import TimeInterval
+from tests.helpers import load
+
+def test_hard_unavailabilities_are_only_checked_with_availabilities():
+    dataset, courses = load("example_small_sample")
+    assert not FeasibilityAnalyzer(courses, dataset).analyze()
+    # The instructor of a lecture unavailable all week: no schedule for `ARCAlgorithm`, `BKTAlgorithm` ignores it
+    lecturer = dataset.get_staff_member(courses[0].get_instructors()[0])
+    dataset.constraints.append(UnavailableStaffTime(lecturer.get_name(), list(TimeInterval), Weight.HARD.value))
+    assert FeasibilityAnalyzer(courses, dataset).analyze()
+    assert not FeasibilityAnalyzer(courses, dataset, availabilities=False).analyze()
@@ -0,0 +1,34 @@
+from algorithms.optimizer import BranchAndBound
+from models.constraints.constants import Weight
+from models.constraints.unavailable_staff_time import UnavailableStaffTime
+from models.course import CourseType
+from models.time_interval import TimeInterval
+from tests.helpers import load
+
+def test_symmetry_breaking_keeps_the_preferred_classroom():
+    # The preferred event of example_hard asks for C411 on Wednesday 10:00-12:00, C401 has the
+    # same type and availability: they must not be merged into one class of classrooms
+    dataset, courses = load("example_hard")
+    courses = [course for course in courses
+               if dataset.get_event(course.get_event_id()).get_name() == "ML"
+               and course.get_group() == "A2" and course.get_type() == CourseType.LABORATORY]
+    for symmetry_breaking in (True, False):
+        optimizer = BranchAndBound(courses, dataset, symmetry_breaking=symmetry_breaking, time_limit=10)
+        assert optimizer.solve()
+        assert optimizer.optimal
+        assert optimizer.best_cost == 0
+        [(_, (classroom, _, _))] = optimizer.best_solution
+        assert classroom.get_id() == "C411"
+
+def test_time_limit_is_not_infeasibility():
+    dataset, courses = load("example_small_sample")
+    # Out of time before the first timetable: nothing is proved
+    optimizer = BranchAndBound(courses, dataset, time_limit=0)
+    assert not optimizer.solve()
+    assert not optimizer.optimal
+    # The instructor of a lecture unavailable all week: proved infeasible
+    lecturer = dataset.get_staff_member(courses[0].get_instructors()[0])
+    dataset.constraints.append(UnavailableStaffTime(lecturer.get_name(), list(TimeInterval), Weight.HARD.value))
+    optimizer = BranchAndBound(courses, dataset, time_limit=10)
+    assert not optimizer.solve()
+    assert optimizer.optimal
@@ -0,0 +1,20 @@
+from algorithms.arc import ARCAlgorithm
+from algorithms.bkt import BKTAlgorithm
+from algorithms.portfolio import run_portfolio
+from tests.helpers import load
+
+def test_bkt_solution_breaking_hard_unavailabilities_is_rejected():
+    # `BKTAlgorithm` ignores the availabilities, on example_hard it schedules staff members when they are unavailable
+    dataset, courses = load("example_hard")
+    algo = BKTAlgorithm(courses, dataset)
+    assert algo.solve()
+    assert not ARCAlgorithm(courses, dataset).is_valid_solution(algo.solution)
+
+def test_portfolio_returns_a_valid_solution():
+    for name in ("example_hard", "example_small_sample"):
+        dataset, courses = load(name)
+        result = run_portfolio(courses, dataset, workers=2)
+        assert result is not None
+        _, solution = result
+        assert len(solution) == len(courses)
+        assert ARCAlgorithm(courses, dataset).is_valid_solution(solution)